@@ -0,0 +1,86 @@
+# benchmarks/fuzzy.py
+#
+# Fuzzy vocabulary lookup on the version with the largest vocabulary: the
+# symmetric-delete VocabularyIndex against a brute-force Levenshtein scan.
+# Queries are vocabulary words with one or two random edits, so both hits
+# and misses are exercised; the two methods must return the same matches.
+#
+# Reads through the configured storage backend, like the API:
+#   python -m benchmarks.fuzzy [--queries 200] [--seed 0] [--accent-insensitive]
+
+import time
+import random
+import asyncio
+import argparse
+
+from pedro_paramo_api.database.engine import get_db_session
+from pedro_paramo_api.database.storage import get_backend
+from pedro_paramo_api.operations.corpus import Corpus
+from pedro_paramo_api.operations.fuzzy import VocabularyIndex, brute_force_search
+
+
+def perturb(word: str, edits: int, alphabet: str, rng: random.Random) -> str:
+    for _ in range(edits):
+        position = rng.randrange(len(word) + 1)
+        operation = rng.choice(("insert", "delete", "substitute")) if word else "insert"
+        if operation == "insert":
+            word = word[:position] + rng.choice(alphabet) + word[position:]
+        elif operation == "delete" and position < len(word):
+            word = word[:position] + word[position + 1:]
+        elif position < len(word):
+            word = word[:position] + rng.choice(alphabet) + word[position + 1:]
+    return word
+
+
+async def largest_vocabulary():
+    backend = get_backend()
+    await backend.init()
+    best = None
+    async for session in get_db_session():
+        for version_name in await backend.version_names(session):
+            corpus = await Corpus.create(session, version_name)
+            word_freq = await corpus.word_freq(session)
+            if isinstance(word_freq, str):
+                continue
+            if best is None or len(word_freq) > len(best[1]):
+                best = (version_name, word_freq)
+        break
+    return best
+
+
+def main(queries: int, seed: int, accent_insensitive: bool):
+    version, word_freq = asyncio.run(largest_vocabulary())
+    words, counts = list(word_freq.keys()), list(word_freq.values())
+    print(f"Version {version}: {len(words)} words")
+
+    start = time.perf_counter()
+    index = VocabularyIndex(words, counts, accent_insensitive)
+    print(f"  Index build: {(time.perf_counter() - start) * 1e3:.1f} ms, {len(index)} keys")
+
+    rng = random.Random(seed)
+    alphabet = "".join(sorted(set("".join(words))))
+    for max_distance in (1, 2):
+        sample = [perturb(rng.choice(words), rng.randint(0, max_distance), alphabet, rng) for _ in range(queries)]
+
+        start = time.perf_counter()
+        index_results = [index.search(word, max_distance) for word in sample]
+        index_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        brute_results = [brute_force_search(words, counts, word, max_distance, accent_insensitive) for word in sample]
+        brute_seconds = time.perf_counter() - start
+
+        assert index_results == brute_results, "Index and brute force disagree"
+        matches = sum(len(result) for result in index_results) / queries
+        print(f"  max_distance={max_distance}: index {index_seconds / queries * 1e3:.3f} ms/query, "
+              f"brute force {brute_seconds / queries * 1e3:.3f} ms/query "
+              f"({brute_seconds / index_seconds:.1f}x), {matches:.1f} matches/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark symmetric-delete fuzzy lookup against a brute-force scan.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--accent-insensitive", action="store_true")
+    args = parser.parse_args()
+    main(args.queries, args.seed, args.accent_insensitive)
@@ -0,0 +1,87 @@
+# benchmarks/load_test.py
+#
+# Measures cheap-endpoint latency (e.g. /{version}/author) on its own and
+# while heavy endpoints (e.g. /{version}/all_embeddings) are saturated, to
+# check that admission control keeps the cheap p99 stable and sheds the
+# heavy overflow with 503s.
+#
+# Runs against a live server and needs httpx (pip install httpx):
+#   python -m benchmarks.load_test http://localhost:9000 <version> \
+#       [--heavy all_embeddings] [--heavy-clients 64] [--cheap-clients 8] [--seconds 20]
+
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+async def hammer(client, url, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url)
+            statuses[response.status_code] += 1
+            if response.status_code == 503:
+                # Honour Retry-After loosely so the run stays a spike, not a spin
+                await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), 0.1))
+                continue
+        except httpx.HTTPError:
+            statuses["error"] += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def phase(base_url, version, cheap, heavy, cheap_clients, heavy_clients, seconds):
+    cheap_latencies, cheap_statuses = [], Counter()
+    heavy_latencies, heavy_statuses = [], Counter()
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=cheap_clients + heavy_clients + 8)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        tasks = [hammer(client, f"/{version}/{cheap}", deadline, cheap_latencies, cheap_statuses)
+                 for _ in range(cheap_clients)]
+        tasks += [hammer(client, f"/{version}/{heavy}", deadline, heavy_latencies, heavy_statuses)
+                  for _ in range(heavy_clients)]
+        await asyncio.gather(*tasks)
+    return (cheap_latencies, cheap_statuses), (heavy_latencies, heavy_statuses)
+
+
+def describe(label, latencies, statuses):
+    print(f"  {label:<8} n={len(latencies):<6} p50={percentile(latencies, 50) * 1e3:8.1f} ms  "
+          f"p99={percentile(latencies, 99) * 1e3:8.1f} ms  statuses={dict(statuses)}")
+
+
+async def main(args):
+    print(f"Baseline: {args.cheap_clients} clients on /{args.version}/{args.cheap}")
+    cheap, _ = await phase(args.base_url, args.version, args.cheap, args.heavy,
+                           args.cheap_clients, 0, args.seconds)
+    describe("cheap", *cheap)
+
+    print(f"Spike: same cheap load plus {args.heavy_clients} clients on /{args.version}/{args.heavy}")
+    cheap_loaded, heavy_loaded = await phase(args.base_url, args.version, args.cheap, args.heavy,
+                                             args.cheap_clients, args.heavy_clients, args.seconds)
+    describe("cheap", *cheap_loaded)
+    describe("heavy", *heavy_loaded)
+
+    ratio = percentile(cheap_loaded[0], 99) / percentile(cheap[0], 99)
+    print(f"Cheap p99 under heavy saturation: {ratio:.2f}x baseline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cheap vs heavy endpoint load test.")
+    parser.add_argument("base_url")
+    parser.add_argument("version")
+    parser.add_argument("--cheap", default="author")
+    parser.add_argument("--heavy", default="all_embeddings")
+    parser.add_argument("--cheap-clients", type=int, default=8)
+    parser.add_argument("--heavy-clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+# benchmarks/serialization.py
+#
+# Bytes per second of the response path for all_paragraphs and word_freq:
+# row materialisation (dict per row vs driver tuples) and JSON encoding
+# (jsonable_encoder + stdlib json, as FastAPI does by default, vs orjson).
+#
+# Needs DATABASE_URL, like the API:
+#   python -m benchmarks.serialization <version> [--repeat 20]
+
+import json
+import time
+import asyncio
+import argparse
+
+from fastapi.encoders import jsonable_encoder
+
+from pedro_paramo_api.database.engine import init_db, get_db_session
+from pedro_paramo_api.database.ask_db import open_request
+from pedro_paramo_api.operations.corpus import Corpus
+from pedro_paramo_api.routers.responses import dumps
+
+
+def stdlib_render(content) -> bytes:
+    # What starlette's JSONResponse.render does after FastAPI's jsonable_encoder
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def report(label: str, n_bytes: int, seconds: float, repeat: int):
+    per_call = seconds / repeat
+    print(f"  {label:<28} {n_bytes / 1e6:8.3f} MB  {per_call * 1e3:9.3f} ms  {n_bytes / per_call / 1e6:9.1f} MB/s")
+
+
+async def bench_rows(session, version: str, repeat: int):
+    query = "SELECT n_paragraph, text FROM paragraph WHERE version_name = :v_n ORDER BY n_paragraph"
+    for label, kwargs in (("rows as dicts", {"fetch_as_dict": True}),
+                          ("rows as tuples", {}),
+                          ("rows columnar", {"columnar": True})):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await open_request(session, query, params={"v_n": version}, **kwargs)
+        print(f"  {label:<28} {(time.perf_counter() - start) / repeat * 1e3:9.3f} ms per query")
+
+
+def bench_encoding(name: str, content, repeat: int):
+    print(f"{name}:")
+    for label, render in (("jsonable_encoder + json", stdlib_render), ("orjson", dumps)):
+        n_bytes = len(render(content))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render(content)
+        report(label, n_bytes, time.perf_counter() - start, repeat)
+
+
+async def main(version: str, repeat: int):
+    await init_db()
+    async for session in get_db_session():
+        corpus = await Corpus.create(session, version)
+        print("all_paragraphs query:")
+        await bench_rows(session, version, repeat)
+        payloads = {
+            "all_paragraphs": await corpus.all_paragraphs(session),
+            "word_freq": await corpus.word_freq(session),
+        }
+        break
+
+    for name, payload in payloads.items():
+        bench_encoding(name, {"version": version, name: payload}, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark row materialisation and JSON encoding.")
+    parser.add_argument("version")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.version, args.repeat))
@@ -0,0 +1,54 @@
+# benchmarks/single_flight.py
+#
+# Fires N simultaneous cold calls of a Corpus method, each with its own
+# session like N HTTP requests would, and counts the SQL statements that
+# reach the database. With single-flight coalescing the count is 1.
+#
+# Needs DATABASE_URL, like the API:
+#   python -m benchmarks.single_flight <version> [--clients 50] [--method word_freq]
+
+import time
+import asyncio
+import argparse
+
+from sqlalchemy import event
+
+from pedro_paramo_api.database import engine as db_engine
+from pedro_paramo_api.database.engine import init_db, AsyncDBSession
+from pedro_paramo_api.operations.corpus import Corpus
+
+
+async def main(version: str, clients: int, method_name: str):
+    await init_db()
+    async with AsyncDBSession() as session:
+        corpus = await Corpus.create(session, version)
+
+    statements = []
+
+    @event.listens_for(db_engine.engine.sync_engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def one_client():
+        async with AsyncDBSession() as session:
+            return await getattr(corpus, method_name)(session)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one_client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    same_result = all(result is results[0] for result in results)
+    print(f"{clients} concurrent '{method_name}' calls on '{version}': "
+          f"{len(statements)} SQL statement(s), shared result: {same_result}, {elapsed * 1e3:.1f} ms")
+    if len(statements) != 1 or not same_result:
+        raise SystemExit("Calls were not coalesced into a single query.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that concurrent cold calls share one DB query.")
+    parser.add_argument("version")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--method", default="word_freq",
+                        choices=["word_freq", "all_paragraphs", "all_embeddings", "all_umap"])
+    args = parser.parse_args()
+    asyncio.run(main(args.version, args.clients, args.method))
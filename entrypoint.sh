@@ -1,12 +1,15 @@
 #!/bin/sh
 
-# Wait for the PostgreSQL database to be available
-echo "Waiting for PostgreSQL to start..."
-while ! pg_isready -h db -p 5432 -U postgres -d pedro_paramo_db > /dev/null; do
-  sleep 1
-done
+# Wait for the PostgreSQL database to be available. The read-only SQLite
+# backend (STORAGE_BACKEND=sqlite) needs no server.
+if [ "${STORAGE_BACKEND:-postgres}" = "postgres" ]; then
+  echo "Waiting for PostgreSQL to start..."
+  while ! pg_isready -h db -p 5432 -U postgres -d pedro_paramo_db > /dev/null; do
+    sleep 1
+  done
 
-echo "PostgreSQL is up and running. Starting the application..."
+  echo "PostgreSQL is up and running. Starting the application..."
+fi
 
 # Run your Python application
 # Assuming your main API entry point is in a file like main.py
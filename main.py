@@ -1,14 +1,110 @@
 # main.py
 import os
+import asyncio
 from fastapi import FastAPI, Depends
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession # Import AsyncSession for type hinting
 
 # Import necessary components from your database setup
-from pedro_paramo_api.database.engine import init_db, get_db_session, engine # Import engine for direct check
+from pedro_paramo_api.database.engine import get_db_session, engine, AsyncDBSession, SQLALCHEMY_DATABASE_URL
+from pedro_paramo_api.database.storage import get_backend
+from pedro_paramo_api.database.notify import CorpusChangeListener
 from pedro_paramo_api.routers import corpus # Your router
+from pedro_paramo_api.routers import clusters
+from pedro_paramo_api.routers import umap
+from pedro_paramo_api.routers import concordance
+from pedro_paramo_api.routers import batch
+from pedro_paramo_api.routers import words
+from pedro_paramo_api.routers import projection
+from pedro_paramo_api.routers.responses import FastJSONResponse
+from pedro_paramo_api.routers.compression import CompressionMiddleware, precompress_corpora
+from pedro_paramo_api.profiling import PROFILING_ENABLED, ProfilingMiddleware
 from pedro_paramo_api.operations.corpus import Corpus # Import Corpus class
 from pedro_paramo_api.operations.sources import get_versions_names # To get all version names
+from pedro_paramo_api.operations.snapshot import get_snapshot_path, open_snapshot, write_snapshot
+from pedro_paramo_api.operations.quantization import get_quantization_mode
+from pedro_paramo_api.database.ask_db import get_content_hash
+
+
+def quantize_corpus_cache(corpus_cache, quantization_mode, keep_float32):
+    if not quantization_mode:
+        return
+    for version_name, corpus_instance in corpus_cache.items():
+        try:
+            corpus_instance.quantize(quantization_mode, keep_float32=keep_float32)
+            print(f"  - Quantized embeddings of version {version_name} to {quantization_mode}")
+        except Exception as e:
+            print(f"  - Failed to quantize embeddings of version {version_name}: {e}")
+
+
+async def refresh_versions(app: FastAPI, version_names):
+    """
+    Rebuilds the Corpus of every changed version and swaps them into the cache
+    together. The cache dicts are replaced, never mutated, so a request that
+    already read app.state.corpus_cache keeps a consistent set of instances.
+    Caches derived from a Corpus live on the instance and go away with it.
+    """
+    snapshot_path = get_snapshot_path()
+    quantization_mode = get_quantization_mode()
+    new_cache = dict(app.state.corpus_cache)
+    refreshed = {}
+
+    async with AsyncDBSession() as session:
+        # Hashed before reloading, like at startup: if a write lands while the
+        # versions reload, the snapshot is stamped with the older hash and is
+        # rejected on restart, instead of stale data passing for current.
+        content_hash = None
+        if snapshot_path:
+            try:
+                content_hash = await get_content_hash(session)
+            except Exception as e:
+                print(f"  - Could not hash the database content, not rewriting snapshot {snapshot_path}: {e}")
+
+        for version_name in sorted(version_names):
+            try:
+                corpus_instance = await Corpus.create(session, version_name)
+            except ValueError:
+                if new_cache.pop(version_name, None) is not None:
+                    print(f"  - Version {version_name} was deleted, removed it from the cache")
+                continue
+            try:
+                if snapshot_path or quantization_mode:
+                    await corpus_instance.load_arrays(session)
+            except Exception as e:
+                print(f"  - Failed to reload version {version_name}, keeping the previous one: {e}")
+                continue
+            new_cache[version_name] = corpus_instance
+            refreshed[version_name] = corpus_instance
+            print(f"  - Reloaded Corpus for version: {version_name}")
+
+        # The snapshot is rewritten before the swap, and the refreshed versions
+        # are taken from it so their float32 embeddings are mmapped, like the
+        # versions loaded at startup, instead of staying on the heap.
+        from_snapshot = False
+        if snapshot_path and content_hash and new_cache:
+            try:
+                write_snapshot(snapshot_path, new_cache, content_hash)
+                print(f"  - Rewrote Corpus snapshot {snapshot_path}")
+                snapshot_cache = open_snapshot(snapshot_path, content_hash, verify_checksum=False)
+                if snapshot_cache is not None:
+                    refreshed = {version_name: snapshot_cache[version_name] for version_name in refreshed}
+                    new_cache.update(refreshed)
+                    from_snapshot = True
+            except Exception as e:
+                print(f"  - Failed to rewrite Corpus snapshot {snapshot_path}: {e}")
+        quantize_corpus_cache(refreshed, quantization_mode, keep_float32=from_snapshot)
+
+        app.state.corpus_cache = new_cache
+        app.state.cluster_cache = {
+            key: value for key, value in app.state.cluster_cache.items()
+            if not set(key[0]) & set(version_names)
+        }
+        app.state.projection_cache = {
+            key: value for key, value in app.state.projection_cache.items()
+            if not set(key[0]) & set(version_names)
+        }
+
+    await precompress_corpora(list(refreshed.values()))
 
 
 @asynccontextmanager
@@ -16,10 +112,12 @@ async def lifespan(app: FastAPI):
     # This block runs on application startup
     print('... Starting Pedro Paramo API ...')
 
-    # Initialize the database connection and tables
+    # Initialize the storage backend (Postgres connection and tables, or the
+    # read-only SQLite file)
+    backend = get_backend()
     try:
-        await init_db()
-        print('... Database initialization completed successfully ...')
+        await backend.init()
+        print(f'... Database initialization completed successfully ({backend.name}) ...')
     except Exception as e:
         print(f'!!! Critical Error during database initialization: {e} !!!')
         # Depending on your needs, you might want to exit here if DB is essential
@@ -27,11 +125,30 @@ async def lifespan(app: FastAPI):
 
     # --- NEW: Initialize Corpus cache ---
     app.state.corpus_cache = {}
+    app.state.cluster_cache = {} # Cross-version clustering results
+    app.state.projection_cache = {} # /project results, keyed by versions and subset hash
     print('... Pre-loading Corpus versions into memory ...')
     try:
         # Get a database session to fetch version names
         # Use async for to correctly manage the async generator
         async for session in get_db_session():
+            # Warm restart: if a snapshot built from the same DB content exists,
+            # map it instead of reloading every version over the network.
+            snapshot_path = get_snapshot_path()
+            quantization_mode = get_quantization_mode()
+            content_hash = None
+            if snapshot_path:
+                try:
+                    content_hash = await get_content_hash(session)
+                    snapshot_cache = open_snapshot(snapshot_path, content_hash)
+                    if snapshot_cache is not None:
+                        app.state.corpus_cache = snapshot_cache
+                        print(f"  - Loaded {len(snapshot_cache)} Corpus versions from snapshot {snapshot_path}")
+                        quantize_corpus_cache(app.state.corpus_cache, quantization_mode, keep_float32=True)
+                        break
+                except Exception as e:
+                    print(f"  - Could not use snapshot {snapshot_path}, falling back to the database: {e}")
+
             version_names_list = await get_versions_names(session)
 
             if not version_names_list:
@@ -44,25 +161,76 @@ async def lifespan(app: FastAPI):
                         try:
                             # Create and cache each Corpus instance
                             corpus_instance = await Corpus.create(session, version_name)
+                            if snapshot_path or quantization_mode:
+                                await corpus_instance.load_arrays(session)
                             app.state.corpus_cache[version_name] = corpus_instance
                             print(f"  - Loaded Corpus for version: {version_name}")
                         except Exception as e:
                             print(f"  - Failed to load Corpus for version {version_name}: {e}")
+
+            from_snapshot = False
+            if snapshot_path and content_hash and app.state.corpus_cache:
+                try:
+                    write_snapshot(snapshot_path, app.state.corpus_cache, content_hash)
+                    print(f"  - Wrote Corpus snapshot to {snapshot_path}")
+                except Exception as e:
+                    print(f"  - Failed to write Corpus snapshot to {snapshot_path}: {e}")
+                else:
+                    # Serve from the new snapshot, so the float32 embeddings
+                    # are mmapped instead of on the heap
+                    try:
+                        snapshot_cache = open_snapshot(snapshot_path, content_hash, verify_checksum=False)
+                        if snapshot_cache is not None:
+                            app.state.corpus_cache = snapshot_cache
+                            from_snapshot = True
+                    except Exception as e:
+                        print(f"  - Could not reopen snapshot {snapshot_path}: {e}")
+            # Snapshot embeddings are mmapped and only paged in when touched, so
+            # they stay around for re-ranking; otherwise the float32 copy is dropped.
+            quantize_corpus_cache(app.state.corpus_cache, quantization_mode, keep_float32=from_snapshot)
             break # Break out of the async for loop after processing
     except Exception as e:
         print(f"!!! Error during Corpus pre-loading: {e} !!!")
     # --- END NEW ---
 
+    # Refresh single versions when the version/paragraph tables change. A
+    # read-only backend never changes while the API runs.
+    listener = None
+    if not backend.read_only:
+        listener = CorpusChangeListener(
+            SQLALCHEMY_DATABASE_URL,
+            on_change=lambda version_names: refresh_versions(app, version_names),
+            all_versions=lambda: set(app.state.corpus_cache)
+        )
+        await listener.start()
+
+    # Build compressed variants of the large static payloads in the background
+    precompress_task = asyncio.create_task(precompress_corpora(list(app.state.corpus_cache.values())))
+
     print('... PEDRO_PARAMO ON ... (allegedly, maybe)')
     yield # Application serves requests
     # This block runs on application shutdown
+    precompress_task.cancel()
+    if listener is not None:
+        await listener.stop()
     print('... Server PEDRO_PARAMO DOWN YO!...')
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+if PROFILING_ENABLED:
+    # Outermost, so profiles include compression. Not installed at all otherwise.
+    app.add_middleware(ProfilingMiddleware)
 
 @app.get("/")
 def read_root():
     return '... PEDRO_PARAMO RUNNING YO ...'
 
-# Include your router
+# Include your routers. The specific /{version}/... routes must come before
+# the catch-all /{version}/{attribute_or_method_name} in the corpus router.
+app.include_router(clusters.router)
+app.include_router(umap.router)
+app.include_router(concordance.router)
+app.include_router(batch.router)
+app.include_router(words.router)
+app.include_router(projection.router)
 app.include_router(corpus.router)
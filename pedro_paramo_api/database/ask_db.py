@@ -1,74 +1,42 @@
 # pedro_paramo_api/database/ask_db.py
 
-import asyncpg
-# from .db_interface import DBInterface # Removed: No longer directly managing sessions here
-from .models import Version
-from sqlalchemy import text, select
 from sqlalchemy.ext.asyncio import AsyncSession # Import AsyncSession for type hinting
-from urllib.parse import urlparse
-from typing import Tuple, Set, List, Dict, Any, Union
-import ast
+from typing import List, Dict, Any, Union
 import numpy as np
 
+# open_request lives in query.py so the storage backends can use it; it is
+# still importable from here.
+from .query import open_request
+from .storage import get_backend
+
 # Removed get_async_db_session() as engine.py now provides get_db_session
 
-async def open_request(session: AsyncSession, # Session is now passed as an argument
-                       sql_question: str,
-                       params: Union[Tuple[Any, ...], Dict[str, Any], None] = None,
-                       fetch_as_dict: bool = False) -> Union[List[Dict[str, Any]], List[Tuple[Any, ...]], None]:
-    """
-    Executes a SQL query asynchronously using SQLAlchemy's AsyncSession.
-    """
-    try:
-        # Use async with session.begin() to start and manage a transaction
-        async with session.begin(): # Transaction management is now within this function
-            result = await session.execute(text(sql_question), params)
-
-            if result.returns_rows:
-                if fetch_as_dict:
-                    column_names = result.keys()
-                    results = [dict(zip(column_names, row)) for row in result.fetchall()]
-                    return results
-                else:
-                    return result.fetchall()
-            else:
-                return None
-    except Exception as e:
-        # The transaction will be automatically rolled back on an exception
-        print(f"Error in open_request: {e}")
-        raise
+def paragraph_not_found(n_paragraph: int) -> str:
+    # get_n_paragraph returns text on success, so callers tell errors apart by this message
+    return f"this paragraph: {n_paragraph} doesn't exist"
 
 async def get_n_paragraph(session: AsyncSession, version: str, n_paragraph: int): # Session added
     n_paragraph = int(n_paragraph)
-    data = await open_request(session, # Pass session
-                              """SELECT text FROM paragraph WHERE n_paragraph = :n_p
-                                 AND version_name = :v_n;
-                              """, params = {"n_p":n_paragraph,"v_n":version})
-    if not data: # Simplified check for empty data
-        return f"this paragraph: {n_paragraph} doesn't exist"
-    return data[0][0]
+    data = await get_backend().paragraph_columns(session, version, ["text"], n_paragraphs=[n_paragraph])
+    if not data["text"]: # Simplified check for empty data
+        return paragraph_not_found(n_paragraph)
+    return data["text"][0]
 
 async def get_n_paragraph_embedding(session: AsyncSession, version: str, n_paragraph: int): # Session added
     n_paragraph = int(n_paragraph)
-    data = await open_request(session, # Pass session
-                              """SELECT embedding FROM paragraph WHERE n_paragraph = :n_p
-                                 AND version_name = :v_n;
-                              """, params = {"n_p":n_paragraph,"v_n":version})
-    if not data: # Simplified check for empty data
-        return f"this paragraph: {n_paragraph} doesn't exist"
-    raw_embedding_value = data[0][0]
-
     try:
-        embedding_list = ast.literal_eval(str(raw_embedding_value))
-        return embedding_list
-    except (ValueError, SyntaxError) as e:
+        embedding_list = await get_backend().paragraph_vector(session, version, n_paragraph, "embedding")
+    except ValueError as e:
         return f"Error parsing UMAP embedding for paragraph {n_paragraph} in version {version}: {e}"
+    if embedding_list is None: # Simplified check for empty data
+        return paragraph_not_found(n_paragraph)
+    return embedding_list
 
 async def get_all_embeddings(session: AsyncSession, version: str): # Session added
     """
     Retrieves all embeddings for a given version, returning them
-    as a NumPy array (matrix), sorted by n_paragraph. Ensures embeddings are
-    parsed as Python lists (vectors) before converting to NumPy.
+    as a NumPy array (matrix), sorted by n_paragraph. Embeddings the backend
+    can't parse are skipped.
 
     Args:
         session (AsyncSession): The database session.
@@ -79,31 +47,17 @@ async def get_all_embeddings(session: AsyncSession, version: str): # Session add
                     sorted by their original n_paragraph.
         str: An error message if the version doesn't exist or no data is found.
     """
+    data = await get_backend().paragraph_columns(session, version, ["n_paragraph", "embedding"])
 
-    query = """
-        SELECT n_paragraph, embedding FROM paragraph
-        WHERE version_name = :v_n;
-    """
-
-    data = await open_request(session, query, params={"v_n": version}) # Pass session
-
-    if not data:
+    if not data["n_paragraph"]:
         return f"This version: {version} doesn't exist or has no paragraphs."
 
-    # Sort the data by 'n_paragraph' (which is at index 0)
-    sorted_data = sorted(data, key=lambda x: x[0])
-
     embeddings_list = []
-    for item in sorted_data:
-        n_paragraph = item[0]
-        raw_embedding_value = item[1]
-
-        try:
-            embedding_list_item = ast.literal_eval(str(raw_embedding_value))
-            embeddings_list.append(embedding_list_item)
-        except (ValueError, SyntaxError) as e:
-            print(f"Warning: Could not parse embedding for paragraph {n_paragraph} in version {version}. Error: {e}. Skipping this embedding.")
+    for n_paragraph, embedding in zip(data["n_paragraph"], data["embedding"]):
+        if embedding is None:
+            print(f"Warning: Could not parse embedding for paragraph {n_paragraph} in version {version}. Skipping this embedding.")
             continue
+        embeddings_list.append(embedding)
 
     if not embeddings_list:
         return f"No valid embeddings found for version: {version} after parsing."
@@ -113,8 +67,8 @@ async def get_all_embeddings(session: AsyncSession, version: str): # Session add
 async def get_all_umap_embeddings(session: AsyncSession, version: str): # Session added
     """
     Retrieves all UMAP embeddings for a given version, returning them
-    as a NumPy array (matrix), sorted by n_paragraph. Ensures UMAP embeddings are
-    parsed as Python lists (vectors) before converting to NumPy.
+    as a NumPy array (matrix), sorted by n_paragraph. UMAP embeddings the
+    backend can't parse are skipped.
 
     Args:
         session (AsyncSession): The database session.
@@ -125,31 +79,17 @@ async def get_all_umap_embeddings(session: AsyncSession, version: str): # Sessio
                     sorted by their original n_paragraph.
         str: An error message if the version doesn't exist or no data is found.
     """
+    data = await get_backend().paragraph_columns(session, version, ["n_paragraph", "umap"])
 
-    query = """
-        SELECT n_paragraph, umap FROM paragraph
-        WHERE version_name = :v_n;
-    """
-
-    data = await open_request(session, query, params={"v_n": version}) # Pass session
-
-    if not data:
+    if not data["n_paragraph"]:
         return f"This version: {version} doesn't exist or has no UMAP embeddings."
 
-    # Sort the data by 'n_paragraph' (which is at index 0)
-    sorted_data = sorted(data, key=lambda x: x[0])
-
     umap_embeddings_list = []
-    for item in sorted_data:
-        n_paragraph = item[0]
-        raw_umap_embedding_value = item[1]
-
-        try:
-            umap_embedding_list_item = ast.literal_eval(str(raw_umap_embedding_value))
-            umap_embeddings_list.append(umap_embedding_list_item)
-        except (ValueError, SyntaxError) as e:
-            print(f"Warning: Could not parse UMAP embedding for paragraph {n_paragraph} in version {version}. Error: {e}. Skipping this embedding.")
+    for n_paragraph, umap_embedding in zip(data["n_paragraph"], data["umap"]):
+        if umap_embedding is None:
+            print(f"Warning: Could not parse UMAP embedding for paragraph {n_paragraph} in version {version}. Skipping this embedding.")
             continue
+        umap_embeddings_list.append(umap_embedding)
 
     if not umap_embeddings_list:
         return f"No valid UMAP embeddings found for version: {version} after parsing."
@@ -159,20 +99,91 @@ async def get_all_umap_embeddings(session: AsyncSession, version: str): # Sessio
 async def get_n_paragraph_umap(session: AsyncSession, version: str, n_paragraph: int): # Session added
     n_paragraph = int(n_paragraph)
 
-    query = """
-        SELECT umap FROM paragraph
-        WHERE n_paragraph = :n_p AND version_name = :v_n;
+    try:
+        umap_embedding_list = await get_backend().paragraph_vector(session, version, n_paragraph, "umap")
+    except ValueError as e:
+        return f"Error parsing UMAP embedding for paragraph {n_paragraph} in version {version}: {e}"
+
+    if umap_embedding_list is None:
+        return f"This paragraph: {n_paragraph} in version: {version} doesn't exist."
+    return umap_embedding_list
+
+async def get_paragraph_arrays(session: AsyncSession, version: str) -> Union[Dict[str, Any], str]:
     """
+    Retrieves every paragraph of a version in a single query and returns its
+    columns as aligned arrays, sorted by n_paragraph. Rows whose embedding or
+    UMAP vector can't be parsed are dropped as a whole so that row i of every
+    array always refers to the same paragraph.
 
-    data = await open_request(session, query, params={"n_p": n_paragraph, "v_n": version}) # Pass session
+    Args:
+        session (AsyncSession): The database session.
+        version (str): The name of the version.
 
-    if not data:
-        return f"This paragraph: {n_paragraph} in version: {version} doesn't exist."
+    Returns:
+        Dict[str, Any]: 'n_paragraph' (int32 array), 'text' (list of str),
+                        'n_words' (int32 array), 'embedding' (float32 matrix)
+                        and 'umap' (float32 matrix).
+        str: An error message if the version doesn't exist or has no paragraphs.
+    """
+    columns = await get_backend().paragraph_columns(session, version, ["n_paragraph", "text", "n_words", "embedding", "umap"])
+
+    if not columns["n_paragraph"]:
+        return f"This version: {version} doesn't exist or has no paragraphs."
 
-    raw_umap_embedding_value = data[0][0]
+    keep = []
+    for row, (n_paragraph, embedding, umap) in enumerate(zip(columns["n_paragraph"], columns["embedding"], columns["umap"])):
+        if embedding is None or umap is None:
+            print(f"Warning: Could not parse vectors for paragraph {n_paragraph} in version {version}. Skipping this paragraph.")
+            continue
+        keep.append(row)
 
-    try:
-        umap_embedding_list = ast.literal_eval(str(raw_umap_embedding_value))
-        return umap_embedding_list
-    except (ValueError, SyntaxError) as e:
-        return f"Error parsing UMAP embedding for paragraph {n_paragraph} in version {version}: {e}"
+    if not keep:
+        return f"No valid paragraphs found for version: {version} after parsing."
+
+    return {
+        "n_paragraph": np.array(columns["n_paragraph"], dtype=np.int32)[keep],
+        "text": [columns["text"][row] for row in keep],
+        "n_words": np.array(columns["n_words"], dtype=np.int32)[keep],
+        "embedding": np.array([columns["embedding"][row] for row in keep], dtype=np.float32),
+        "umap": np.array([columns["umap"][row] for row in keep], dtype=np.float32),
+    }
+
+async def get_content_hash(session: AsyncSession) -> str:
+    """
+    Fingerprint of the 'version' and 'paragraph' tables. Any insert, delete
+    or update of a text, word set or vector changes it.
+
+    Args:
+        session (AsyncSession): The database session.
+
+    Returns:
+        str: An md5 hex digest of the content of both tables.
+    """
+    return await get_backend().content_hash(session)
+
+async def get_embeddings_by_paragraph(session: AsyncSession, version: str, n_paragraphs: List[int]) -> Dict[int, np.ndarray]:
+    """
+    Retrieves the exact float32 embeddings of a handful of paragraphs, e.g.
+    the candidates of a quantized similarity scan that need re-ranking.
+
+    Args:
+        session (AsyncSession): The database session.
+        version (str): The name of the version.
+        n_paragraphs (List[int]): The paragraph numbers to fetch.
+
+    Returns:
+        Dict[int, np.ndarray]: Paragraph number -> embedding vector. Paragraphs
+                               that don't exist or can't be parsed are left out.
+    """
+    if not n_paragraphs:
+        return {}
+
+    data = await get_backend().paragraph_columns(session, version, ["n_paragraph", "embedding"], n_paragraphs=n_paragraphs)
+
+    embeddings = {}
+    for n_paragraph, embedding in zip(data["n_paragraph"], data["embedding"]):
+        if embedding is None:
+            print(f"Warning: Could not parse embedding for paragraph {n_paragraph} in version {version}. Skipping this embedding.")
+            continue
+        embeddings[n_paragraph] = embedding
+    return embeddings
@@ -11,13 +11,15 @@ from urllib.parse import urlparse
 # Import Base from your models.py. Ensure models.py defines 'Base = declarative_base()'
 # If Base is not defined in models.py, you might need to define it here or import it correctly.
 from .models import Base
+from .notify import install_triggers
 
 # Get the database URL from environment variables
 # This is the connection string that your application will use.
 # It matches the DATABASE_URL defined in docker-compose.yml
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
-# Ensure the DATABASE_URL is set, otherwise raise an error
-if not SQLALCHEMY_DATABASE_URL:
+# Ensure the DATABASE_URL is set, otherwise raise an error. The read-only
+# SQLite backend (see storage.py) doesn't need it.
+if not SQLALCHEMY_DATABASE_URL and os.getenv("STORAGE_BACKEND", "postgres") == "postgres":
     raise ValueError("DATABASE_URL environment variable is not set. Please check your docker-compose.yml.")
 
 # Define the async engine globally
@@ -83,6 +85,15 @@ async def init_db():
         await conn.run_sync(Base.metadata.create_all)
         print("Database tables checked/created.")
 
+    # Triggers that publish version/paragraph changes so the API can refresh
+    # its Corpus cache without a restart. Not fatal: without them the cache
+    # just isn't refreshed.
+    try:
+        await install_triggers(engine)
+        print("Corpus change triggers checked/created.")
+    except Exception as e:
+        print(f"Warning: could not install corpus change triggers: {e}")
+
     # Configure the sessionmaker to use the initialized engine
     AsyncDBSession.configure(bind=engine)
     print("Database initialization complete.")
@@ -96,3 +107,41 @@ async def get_db_session() -> AsyncSession:
 
 # Expose the engine globally after init_db is called, for use in main.py's lifespan or other modules.
 # This makes it accessible for direct connection checks or other advanced uses.
+
+class LazySession:
+    """
+    Stands in for an AsyncSession and only creates the real one the first time
+    something on it is used. Requests answered from memory (attributes,
+    cached arrays) never build a session at all.
+    """
+
+    def __init__(self):
+        self._session = None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = AsyncDBSession()
+        return self._session
+
+    @property
+    def created(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        # Only reached for names LazySession doesn't define itself
+        return getattr(self._get_session(), name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+async def get_lazy_db_session() -> AsyncSession:
+    """
+    Dependency function for FastAPI giving a session that is created on first use.
+    """
+    session = LazySession()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,99 @@
+# pedro_paramo_api/database/export_sqlite.py
+#
+# Exports the version and paragraph tables from Postgres into the single-file
+# read-only database used by STORAGE_BACKEND=sqlite. Needs DATABASE_URL:
+#   python -m pedro_paramo_api.database.export_sqlite pedro_paramo.sqlite
+
+import os
+import time
+import sqlite3
+import asyncio
+import argparse
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession # Import AsyncSession for type hinting
+
+from .engine import init_db, get_db_session
+from .storage import (
+    PostgresBackend,
+    VERSION_COLUMNS,
+    PARAGRAPH_COLUMNS,
+    VECTOR_COLUMNS,
+    SQLITE_FORMAT_VERSION,
+    SQLITE_SCHEMA,
+    vector_to_blob
+)
+
+
+def _insert(table: str, columns) -> str:
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    return f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' * len(columns))})"
+
+
+async def export_sqlite(session: AsyncSession, path: str) -> Dict[str, int]:
+    """
+    Copies every version and paragraph from Postgres into a new SQLite file.
+    The file is written next to `path` and renamed over it at the end, so a
+    server reading the previous export never sees a half-written one.
+
+    Args:
+        session (AsyncSession): A Postgres database session.
+        path (str): Where to write the SQLite file.
+
+    Returns:
+        Dict[str, int]: The number of 'versions' and 'paragraphs' exported.
+    """
+    source = PostgresBackend()
+    temporary_path = f"{path}.tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+    paragraph_columns = [column for column in PARAGRAPH_COLUMNS if column != "id"]
+    counts = {"versions": 0, "paragraphs": 0}
+    connection = sqlite3.connect(temporary_path)
+    try:
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+
+        for version_name in await source.version_names(session):
+            version_row = await source.version_columns(session, version_name, VERSION_COLUMNS)
+            connection.execute(_insert("version", VERSION_COLUMNS), [version_row[column] for column in VERSION_COLUMNS])
+
+            columns = await source.paragraph_columns(session, version_name, paragraph_columns)
+            for column in VECTOR_COLUMNS:
+                columns[column] = [vector_to_blob(vector) for vector in columns[column]]
+            connection.executemany(_insert("paragraph", paragraph_columns),
+                                   zip(*(columns[column] for column in paragraph_columns)))
+            counts["versions"] += 1
+            counts["paragraphs"] += len(columns["n_paragraph"])
+            print(f"  - Exported version {version_name} ({len(columns['n_paragraph'])} paragraphs)")
+
+        meta = {
+            "format_version": SQLITE_FORMAT_VERSION,
+            "content_hash": await source.content_hash(session),
+            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        connection.commit()
+    except Exception:
+        connection.close()
+        os.remove(temporary_path)
+        raise
+    connection.close()
+    os.replace(temporary_path, path)
+    return counts
+
+
+async def main(path: str):
+    await init_db()
+    async for session in get_db_session():
+        counts = await export_sqlite(session, path)
+        break
+    print(f"Exported {counts['versions']} versions and {counts['paragraphs']} paragraphs to {path}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the corpus from Postgres to a read-only SQLite file.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    asyncio.run(main(args.path))
@@ -0,0 +1,130 @@
+# pedro_paramo_api/database/notify.py
+
+import asyncio
+import asyncpg
+from urllib.parse import urlparse
+from typing import Awaitable, Callable, Optional, Set
+from sqlalchemy import text
+
+# Channel the triggers publish on. The payload is the version_name of the
+# changed row; Postgres delivers identical notifications of one transaction
+# only once, so re-embedding a whole version sends a single message.
+CORPUS_CHANNEL = "corpus_changed"
+
+TRIGGER_STATEMENTS = [
+    f"""
+    CREATE OR REPLACE FUNCTION notify_corpus_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM pg_notify('{CORPUS_CHANNEL}', OLD.version_name);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM pg_notify('{CORPUS_CHANNEL}', NEW.version_name);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE OR REPLACE TRIGGER version_corpus_changed
+    AFTER INSERT OR UPDATE OR DELETE ON version
+    FOR EACH ROW EXECUTE FUNCTION notify_corpus_changed();
+    """,
+    """
+    CREATE OR REPLACE TRIGGER paragraph_corpus_changed
+    AFTER INSERT OR UPDATE OR DELETE ON paragraph
+    FOR EACH ROW EXECUTE FUNCTION notify_corpus_changed();
+    """,
+]
+
+
+async def install_triggers(engine) -> None:
+    """Creates (or replaces) the change notification triggers on version and paragraph."""
+    async with engine.begin() as conn:
+        for statement in TRIGGER_STATEMENTS:
+            await conn.execute(text(statement))
+
+
+class CorpusChangeListener:
+    """
+    Listens on CORPUS_CHANNEL with a dedicated asyncpg connection and calls
+    on_change with the set of changed version names. Notifications arriving
+    within `debounce` seconds of each other are handled as one batch. If the
+    connection drops it reconnects, and since notifications sent meanwhile
+    are lost, it reports every version from `all_versions()` as changed.
+    """
+
+    def __init__(self,
+                 database_url: str,
+                 on_change: Callable[[Set[str]], Awaitable[None]],
+                 all_versions: Callable[[], Set[str]],
+                 debounce: float = 1.0,
+                 reconnect_delay: float = 5.0):
+        self.database_url = database_url
+        self.on_change = on_change
+        self.all_versions = all_versions
+        self.debounce = debounce
+        self.reconnect_delay = reconnect_delay
+        self._pending: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def _notified(self, connection, pid, channel, payload):
+        self._pending.add(payload)
+        self._wakeup.set()
+
+    async def _connect(self) -> asyncpg.Connection:
+        parsed_url = urlparse(self.database_url)
+        return await asyncpg.connect(
+            user=parsed_url.username,
+            password=parsed_url.password,
+            host=parsed_url.hostname,
+            port=parsed_url.port,
+            database=parsed_url.path.lstrip('/')
+        )
+
+    async def _listen(self):
+        first_connection = True
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await self._connect()
+                await connection.add_listener(CORPUS_CHANNEL, self._notified)
+                print(f"... Listening for corpus changes on '{CORPUS_CHANNEL}' ...")
+                if not first_connection:
+                    self._pending.update(self.all_versions())
+                    self._wakeup.set()
+                first_connection = False
+                while not connection.is_closed():
+                    await asyncio.sleep(self.reconnect_delay)
+                print("Corpus change listener lost its connection, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in corpus change listener: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    async def _dispatch(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.debounce)
+            self._wakeup.clear()
+            versions, self._pending = self._pending, set()
+            if not versions:
+                continue
+            try:
+                await self.on_change(versions)
+            except Exception as e:
+                print(f"Error refreshing versions {sorted(versions)}: {e}")
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._dispatch())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
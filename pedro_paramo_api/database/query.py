@@ -0,0 +1,44 @@
+# pedro_paramo_api/database/query.py
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession # Import AsyncSession for type hinting
+from typing import Tuple, List, Dict, Any, Union
+from ..profiling import profiled
+
+
+@profiled("db_io")
+async def open_request(session: AsyncSession, # Session is now passed as an argument
+                       sql_question: str,
+                       params: Union[Tuple[Any, ...], Dict[str, Any], None] = None,
+                       fetch_as_dict: bool = False,
+                       columnar: bool = False) -> Union[List[Dict[str, Any]], List[Tuple[Any, ...]], Dict[str, Tuple[Any, ...]], None]:
+    """
+    Executes a SQL query asynchronously using SQLAlchemy's AsyncSession.
+
+    Rows come back as the driver's tuples by default, which is the cheapest
+    form. fetch_as_dict builds one dict per row; columnar transposes the
+    result once into {column_name: tuple_of_values}, which is what array
+    building and columnar JSON want.
+    """
+    try:
+        # Use async with session.begin() to start and manage a transaction
+        async with session.begin(): # Transaction management is now within this function
+            result = await session.execute(text(sql_question), params)
+
+            if result.returns_rows:
+                if columnar:
+                    column_names = tuple(result.keys())
+                    rows = result.fetchall()
+                    columns = tuple(zip(*rows)) if rows else tuple(() for _ in column_names)
+                    return dict(zip(column_names, columns))
+                elif fetch_as_dict:
+                    column_names = tuple(result.keys())
+                    return [dict(zip(column_names, row)) for row in result.fetchall()]
+                else:
+                    return result.fetchall()
+            else:
+                return None
+    except Exception as e:
+        # The transaction will be automatically rolled back on an exception
+        print(f"Error in open_request: {e}")
+        raise
@@ -0,0 +1,381 @@
+# pedro_paramo_api/database/storage.py
+
+import os
+import ast
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession # Import AsyncSession for type hinting
+
+from .engine import init_db
+from .models import Version, Paragraph
+from .query import open_request
+from ..profiling import profiled
+
+# Which backend serves reads: "postgres" (default) or "sqlite", a read-only
+# single file written by database/export_sqlite.py.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgres")
+SQLITE_DATABASE_PATH = os.getenv("SQLITE_DATABASE_PATH", "pedro_paramo.sqlite")
+
+VERSION_COLUMNS = tuple(column.name for column in Version.__table__.columns)
+PARAGRAPH_COLUMNS = tuple(column.name for column in Paragraph.__table__.columns)
+VECTOR_COLUMNS = {"embedding", "umap"}
+
+# Vectors come back from pgvector as text and are parsed with this
+_literal_eval = profiled("literal_eval")(ast.literal_eval)
+
+
+def _check_columns(columns: Sequence[str], allowed: Sequence[str]) -> None:
+    # Column names end up in the SQL text, so only known ones are accepted
+    unknown = [column for column in columns if column not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+
+def _select_list(columns: Sequence[str]) -> str:
+    return ", ".join(f'"{column}"' for column in columns)
+
+
+class StorageBackend(ABC):
+    """
+    Read access to the version and paragraph tables. The functions in
+    sources.py, frequencies.py and ask_db.py only go through these methods,
+    so they work the same on any backend.
+
+    Every method takes the request's session first; backends that don't talk
+    to Postgres ignore it, so a LazySession is never turned into a real one.
+    """
+
+    name = "base"
+    # Read-only backends get no change notifications (and need none)
+    read_only = False
+
+    @abstractmethod
+    async def init(self) -> None:
+        """Prepares the backend at startup."""
+
+    @abstractmethod
+    async def version_names(self, session: AsyncSession) -> List[str]:
+        """Names of every version, sorted."""
+
+    @abstractmethod
+    async def version_columns(self, session: AsyncSession, version: str,
+                              columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Columns of one version row.
+
+        Args:
+            session (AsyncSession): The database session.
+            version (str): The name of the version.
+            columns (Optional[Sequence[str]]): Columns to read, all of them if None.
+
+        Returns:
+            Optional[Dict[str, Any]]: Column name -> value, or None if the
+                                      version doesn't exist.
+        """
+
+    @abstractmethod
+    async def paragraph_columns(self, session: AsyncSession, version: str, columns: Sequence[str],
+                                n_paragraphs: Optional[Sequence[int]] = None) -> Dict[str, list]:
+        """
+        Columns of the paragraphs of a version, sorted by n_paragraph.
+
+        Args:
+            session (AsyncSession): The database session.
+            version (str): The name of the version.
+            columns (Sequence[str]): Columns to read.
+            n_paragraphs (Optional[Sequence[int]]): Only these paragraphs, all of them if None.
+
+        Returns:
+            Dict[str, list]: Column name -> list of values, row i of every list
+                             being the same paragraph. Vector columns hold
+                             float32 arrays, or None where the stored vector
+                             can't be parsed. Empty lists if nothing matches.
+        """
+
+    @abstractmethod
+    async def paragraph_vector(self, session: AsyncSession, version: str, n_paragraph: int,
+                               column: str) -> Optional[List[float]]:
+        """
+        One vector of one paragraph with the stored decimals, as the
+        single-paragraph endpoints return it. Unlike paragraph_columns it is
+        not widened from float32, so every backend renders the same JSON.
+
+        Args:
+            session (AsyncSession): The database session.
+            version (str): The name of the version.
+            n_paragraph (int): The paragraph number.
+            column (str): 'embedding' or 'umap'.
+
+        Returns:
+            Optional[List[float]]: The vector, or None if the paragraph
+                                   doesn't exist.
+
+        Raises:
+            ValueError: If the stored vector can't be parsed.
+        """
+
+    @abstractmethod
+    async def content_hash(self, session: AsyncSession) -> str:
+        """Fingerprint of the content of both tables, used to validate snapshots."""
+
+
+def _parse_vector(raw_value) -> Optional[np.ndarray]:
+    try:
+        return np.array(_literal_eval(str(raw_value)), dtype=np.float32)
+    except (ValueError, SyntaxError, TypeError):
+        return None
+
+
+def _check_vector_column(column: str) -> None:
+    if column not in VECTOR_COLUMNS:
+        raise ValueError(f"'{column}' is not a vector column.")
+
+
+class PostgresBackend(StorageBackend):
+    """The version and paragraph tables in Postgres with pgvector columns."""
+
+    name = "postgres"
+
+    async def init(self) -> None:
+        await init_db()
+
+    async def version_names(self, session: AsyncSession) -> List[str]:
+        data = await open_request(session, "SELECT version_name FROM version ORDER BY version_name")
+        return [row[0] for row in data or []]
+
+    async def version_columns(self, session: AsyncSession, version: str,
+                              columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        if columns is not None:
+            _check_columns(columns, VERSION_COLUMNS)
+        select_list = "*" if columns is None else _select_list(columns)
+        data = await open_request(session,
+                                  f"SELECT {select_list} FROM version WHERE version_name = :v_n",
+                                  params={"v_n": version},
+                                  fetch_as_dict=True)
+        return data[0] if data else None
+
+    async def paragraph_columns(self, session: AsyncSession, version: str, columns: Sequence[str],
+                                n_paragraphs: Optional[Sequence[int]] = None) -> Dict[str, list]:
+        _check_columns(columns, PARAGRAPH_COLUMNS)
+        params = {"v_n": version}
+        query = f"SELECT {_select_list(columns)} FROM paragraph WHERE version_name = :v_n"
+        if n_paragraphs is not None:
+            query += " AND n_paragraph = ANY(:n_ps)"
+            params["n_ps"] = [int(n) for n in n_paragraphs]
+        query += " ORDER BY n_paragraph"
+
+        data = await open_request(session, query, params=params, columnar=True)
+        result = {}
+        for column in columns:
+            values = data[column] if data else ()
+            result[column] = [_parse_vector(value) for value in values] if column in VECTOR_COLUMNS else list(values)
+        return result
+
+    async def paragraph_vector(self, session: AsyncSession, version: str, n_paragraph: int,
+                               column: str) -> Optional[List[float]]:
+        _check_vector_column(column)
+        data = await open_request(session,
+                                  f'SELECT "{column}" FROM paragraph WHERE n_paragraph = :n_p AND version_name = :v_n',
+                                  params={"n_p": int(n_paragraph), "v_n": version})
+        if not data:
+            return None
+        # pgvector prints the shortest decimal of each float32, parsing it
+        # back gives exactly the stored values.
+        try:
+            return _literal_eval(str(data[0][0]))
+        except SyntaxError as e:
+            raise ValueError(str(e)) from e
+
+    async def content_hash(self, session: AsyncSession) -> str:
+        # Computed on the database side, so only one short string crosses the
+        # network. Any insert, delete or update of a text, word set or vector
+        # changes it.
+        query = """
+            SELECT md5(
+                coalesce((SELECT string_agg(
+                              version_name || ':' || author || ':' || year || ':' || editorial || ':' ||
+                              coalesce("ISBN"::text, '') || ':' || md5(version_data) || ':' ||
+                              md5(raw_text) || ':' || md5(word_set) || ':' || n_words || ':' || n_paragraphs,
+                              ',' ORDER BY version_name)
+                          FROM version), '')
+                || '|' ||
+                coalesce((SELECT string_agg(
+                              version_name || ':' || n_paragraph || ':' || md5(text) || ':' || n_words || ':' ||
+                              md5(embedding::text) || ':' || md5(umap::text),
+                              ',' ORDER BY version_name, n_paragraph)
+                          FROM paragraph), '')
+            );
+        """
+        data = await open_request(session, query)
+        return data[0][0]
+
+
+# Version of the file layout written by export_sqlite.py
+SQLITE_FORMAT_VERSION = "1"
+
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE version (
+        id INTEGER PRIMARY KEY,
+        version_name TEXT UNIQUE NOT NULL,
+        author TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        editorial TEXT NOT NULL,
+        "ISBN" INTEGER,
+        version_data TEXT NOT NULL,
+        raw_text TEXT NOT NULL,
+        n_words INTEGER NOT NULL,
+        n_paragraphs INTEGER NOT NULL,
+        word_set TEXT NOT NULL,
+        raw_words TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE paragraph (
+        id INTEGER PRIMARY KEY,
+        version_name TEXT NOT NULL,
+        n_paragraph INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        embedding BLOB,
+        n_words INTEGER NOT NULL,
+        umap BLOB
+    )
+    """,
+    "CREATE INDEX paragraph_version_n_paragraph ON paragraph (version_name, n_paragraph)",
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+
+def vector_to_blob(vector) -> Optional[bytes]:
+    """Little-endian float32 bytes of a vector, None stays None."""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def blob_to_vector(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if blob is None:
+        return None
+    return np.frombuffer(blob, dtype="<f4")
+
+
+def shortest_decimals(vector: np.ndarray) -> List[float]:
+    """
+    The shortest decimal that round-trips each float32, which is what
+    pgvector prints, instead of the float32 widened to a double
+    (0.12345679 rather than 0.12345679104328156).
+    """
+    return [float(str(value)) for value in np.asarray(vector, dtype=np.float32)]
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    A read-only SQLite file with the same two tables, vectors stored as
+    float32 blobs. No server and no parsing: opening it is instant and a
+    vector is one memcpy away. Queries are short, so they run on one shared
+    connection in the default executor, serialised by a lock.
+    """
+
+    name = "sqlite"
+    read_only = True
+
+    def __init__(self, path: str = SQLITE_DATABASE_PATH):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def init(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"SQLite database {self.path} doesn't exist. Create it with "
+                                    f"'python -m pedro_paramo_api.database.export_sqlite {self.path}'.")
+        self._connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        format_version = await self._meta("format_version")
+        if format_version != SQLITE_FORMAT_VERSION:
+            raise ValueError(f"SQLite database {self.path} has format {format_version}, "
+                             f"expected {SQLITE_FORMAT_VERSION}. Export it again.")
+        print(f"Opened read-only SQLite database {self.path}.")
+
+    def _execute(self, sql: str, params: Sequence[Any]):
+        if self._connection is None:
+            raise RuntimeError("SQLite backend used before init().")
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            column_names = tuple(description[0] for description in cursor.description)
+            return column_names, cursor.fetchall()
+
+    @profiled("db_io")
+    async def _query(self, sql: str, params: Sequence[Any] = ()):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._execute, sql, params)
+
+    async def _meta(self, key: str) -> Optional[str]:
+        _, rows = await self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    async def version_names(self, session: AsyncSession) -> List[str]:
+        _, rows = await self._query("SELECT version_name FROM version ORDER BY version_name")
+        return [row[0] for row in rows]
+
+    async def version_columns(self, session: AsyncSession, version: str,
+                              columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        if columns is not None:
+            _check_columns(columns, VERSION_COLUMNS)
+        select_list = "*" if columns is None else _select_list(columns)
+        column_names, rows = await self._query(f"SELECT {select_list} FROM version WHERE version_name = ?", (version,))
+        return dict(zip(column_names, rows[0])) if rows else None
+
+    async def paragraph_columns(self, session: AsyncSession, version: str, columns: Sequence[str],
+                                n_paragraphs: Optional[Sequence[int]] = None) -> Dict[str, list]:
+        _check_columns(columns, PARAGRAPH_COLUMNS)
+        params = [version]
+        query = f"SELECT {_select_list(columns)} FROM paragraph WHERE version_name = ?"
+        if n_paragraphs is not None:
+            n_paragraphs = [int(n) for n in n_paragraphs]
+            query += f" AND n_paragraph IN ({', '.join('?' * len(n_paragraphs))})" if n_paragraphs else " AND 0"
+            params.extend(n_paragraphs)
+        query += " ORDER BY n_paragraph"
+
+        _, rows = await self._query(query, params)
+        values = list(zip(*rows)) if rows else [() for _ in columns]
+        result = {}
+        for column, column_values in zip(columns, values):
+            result[column] = [blob_to_vector(value) for value in column_values] if column in VECTOR_COLUMNS else list(column_values)
+        return result
+
+    async def paragraph_vector(self, session: AsyncSession, version: str, n_paragraph: int,
+                               column: str) -> Optional[List[float]]:
+        _check_vector_column(column)
+        _, rows = await self._query(f'SELECT "{column}" FROM paragraph WHERE n_paragraph = ? AND version_name = ?',
+                                    (int(n_paragraph), version))
+        if not rows:
+            return None
+        if rows[0][0] is None:
+            raise ValueError(f"no {column} stored")
+        return shortest_decimals(blob_to_vector(rows[0][0]))
+
+    async def content_hash(self, session: AsyncSession) -> str:
+        # The Postgres content hash at export time, so a snapshot taken from
+        # either side is reusable by the other.
+        return await self._meta("content_hash")
+
+
+BACKENDS = {
+    PostgresBackend.name: PostgresBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_backend() -> StorageBackend:
+    """The backend selected by STORAGE_BACKEND, created on first use."""
+    global _backend
+    if _backend is None:
+        if STORAGE_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'. Use one of: {sorted(BACKENDS)}.")
+        _backend = BACKENDS[STORAGE_BACKEND]()
+    return _backend
@@ -0,0 +1,204 @@
+# pedro_paramo_api/operations/clustering.py
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Clustering runs off the event loop. A thread pool is enough because the
+# heavy part is numpy matmuls, which release the GIL, and it avoids pickling
+# the embedding matrices into another process.
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Results kept per cache (per Corpus, and one for cross-version runs).
+MAX_CACHED_RESULTS = 32
+
+
+def get_cluster_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="clustering")
+    return _executor
+
+
+def remember(cache: Dict[Any, Any], key: Any, value: Any, max_entries: int = MAX_CACHED_RESULTS) -> Any:
+    """Stores a result in a small insertion-ordered cache, evicting the oldest entries."""
+    cache[key] = value
+    while len(cache) > max_entries:
+        cache.pop(next(iter(cache)))
+    return value
+
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """Scales every row to unit length (zero rows are left as they are), as float32."""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (X / norms).astype(np.float32, copy=False)
+
+
+def _squared_distances(X: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, clipped against rounding below zero
+    distances = (np.einsum("ij,ij->i", X, X)[:, None]
+                 - 2.0 * (X @ centroids.T)
+                 + np.einsum("ij,ij->i", centroids, centroids)[None, :])
+    return np.maximum(distances, 0.0, out=distances)
+
+
+def _assign(X: np.ndarray, centroids: np.ndarray, chunk_rows: int = 8192) -> Tuple[np.ndarray, np.ndarray]:
+    labels = np.empty(X.shape[0], dtype=np.int32)
+    distances = np.empty(X.shape[0], dtype=np.float32)
+    for start in range(0, X.shape[0], chunk_rows):
+        d = _squared_distances(X[start:start + chunk_rows], centroids)
+        labels[start:start + d.shape[0]] = d.argmin(axis=1)
+        distances[start:start + d.shape[0]] = d[np.arange(d.shape[0]), labels[start:start + d.shape[0]]]
+    return labels, distances
+
+
+def _kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.Generator, sample_size: int = 4096) -> np.ndarray:
+    sample = X[rng.choice(X.shape[0], size=min(sample_size, X.shape[0]), replace=False)]
+    centroids = np.empty((k, X.shape[1]), dtype=np.float32)
+    centroids[0] = sample[rng.integers(sample.shape[0])]
+    closest = _squared_distances(sample, centroids[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            centroids[i] = sample[rng.integers(sample.shape[0])]
+        else:
+            centroids[i] = sample[rng.choice(sample.shape[0], p=closest / total)]
+        closest = np.minimum(closest, _squared_distances(sample, centroids[i:i + 1])[:, 0])
+    return centroids
+
+
+def minibatch_kmeans(X: np.ndarray,
+                     k: int,
+                     seed: int = 0,
+                     batch_size: int = 1024,
+                     max_iter: int = 100,
+                     tol: float = 1e-5) -> Dict[str, Any]:
+    """
+    Mini-batch k-means (Sculley, 2010) with k-means++ seeding. Every batch
+    moves each centroid towards the mean of its assigned points with a
+    per-centroid learning rate of batch_count / total_count.
+
+    Args:
+        X (np.ndarray): (n, d) float32 matrix.
+        k (int): Number of clusters (capped at n).
+        seed (int): Seed for the initialisation and the batch sampling.
+        batch_size (int): Rows per mini-batch.
+        max_iter (int): Maximum number of mini-batches.
+        tol (float): Stop once the summed squared centroid shift drops below it.
+
+    Returns:
+        Dict[str, Any]: 'centroids' (k, d), 'labels' (n,), 'distances' (n,)
+                        squared distance of each row to its centroid,
+                        'inertia' and 'n_iter'.
+    """
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    k = max(1, min(k, n))
+    centroids = _kmeans_plus_plus(X, k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        batch = X[rng.choice(n, size=min(batch_size, n), replace=False)]
+        batch_labels, _ = _assign(batch, centroids)
+        batch_counts = np.bincount(batch_labels, minlength=k).astype(np.float64)
+        one_hot = np.zeros((batch.shape[0], k), dtype=np.float32)
+        one_hot[np.arange(batch.shape[0]), batch_labels] = 1.0
+        batch_sums = one_hot.T @ batch
+
+        counts += batch_counts
+        moved = batch_counts > 0
+        eta = (batch_counts[moved] / counts[moved]).astype(np.float32)[:, None]
+        updated = centroids.copy()
+        updated[moved] = (1.0 - eta) * centroids[moved] + eta * (batch_sums[moved] / batch_counts[moved][:, None])
+        shift = float(np.sum((updated - centroids) ** 2))
+        centroids = updated
+        if shift < tol:
+            break
+
+    labels, distances = _assign(X, centroids)
+    return {
+        "centroids": centroids,
+        "labels": labels,
+        "distances": distances,
+        "inertia": float(distances.sum()),
+        "n_iter": n_iter,
+    }
+
+
+def _cluster(inputs: List[Tuple[str, np.ndarray, np.ndarray, Optional[np.ndarray]]],
+             k: int,
+             seed: int,
+             n_representatives: int) -> Dict[str, Any]:
+    versions = np.concatenate([np.full(len(numbers), i, dtype=np.int32) for i, (_, numbers, _, _) in enumerate(inputs)])
+    numbers = np.concatenate([numbers for _, numbers, _, _ in inputs])
+    X = normalize_rows(np.concatenate([embeddings for _, _, embeddings, _ in inputs]))
+    version_names = [name for name, _, _, _ in inputs]
+
+    result = minibatch_kmeans(X, k, seed)
+    labels, distances = result["labels"], result["distances"]
+
+    # UMAP coordinates are computed per version, so a centroid only has a
+    # meaningful position on the map when a single version is clustered.
+    umap = inputs[0][3] if len(inputs) == 1 else None
+
+    clusters = []
+    for label in range(result["centroids"].shape[0]):
+        members = np.flatnonzero(labels == label)
+        closest = members[np.argsort(distances[members], kind="stable")[:n_representatives]]
+        cluster = {
+            "label": label,
+            "size": int(members.size),
+            "representatives": [
+                {"version": version_names[versions[i]], "n_paragraph": int(numbers[i]), "distance": float(distances[i])}
+                for i in closest
+            ],
+        }
+        if umap is not None:
+            cluster["umap_centroid"] = umap[members].mean(axis=0).tolist() if members.size else None
+        clusters.append(cluster)
+
+    return {
+        "k": int(result["centroids"].shape[0]),
+        "seed": seed,
+        "inertia": result["inertia"],
+        "n_iter": result["n_iter"],
+        "centroids": result["centroids"].tolist(),
+        "clusters": clusters,
+        # Columnar so the labels can be zipped straight onto the umap points.
+        "paragraphs": {
+            "version": [version_names[v] for v in versions.tolist()],
+            "n_paragraph": numbers.tolist(),
+            "label": labels.tolist(),
+        },
+    }
+
+
+async def cluster_paragraphs(inputs: List[Tuple[str, np.ndarray, np.ndarray, Optional[np.ndarray]]],
+                             k: int,
+                             seed: int = 0,
+                             n_representatives: int = 3) -> Dict[str, Any]:
+    """
+    Clusters the paragraphs of one or more versions in the clustering pool.
+
+    Args:
+        inputs: One (version_name, n_paragraph array, embedding matrix,
+                umap matrix or None) tuple per version, rows aligned.
+        k (int): Number of clusters.
+        seed (int): Random seed, results are deterministic for a given seed.
+        n_representatives (int): Paragraphs closest to each centroid to report.
+
+    Returns:
+        Dict[str, Any]: Centroids, per cluster size and representatives (plus
+                        the UMAP centroid for a single version), and each
+                        paragraph's label.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_cluster_executor(),
+        functools.partial(_cluster, inputs, k, seed, n_representatives)
+    )
@@ -0,0 +1,101 @@
+# pedro_paramo_api/operations/concordance.py
+
+import re
+from typing import Dict, Any, List
+import numpy as np
+
+from .frequencies import clean_line
+
+# Same token boundaries as get_word_freq_dict ('#' and whitespace), but
+# keeping character offsets so the context can be cut from the original text.
+_TOKEN_PATTERN = re.compile(r"[^\s#]+")
+
+
+class ConcordanceIndex:
+    """
+    Positional token index over the paragraphs of one version.
+
+    Every token gets a position in one global sequence. For each token the
+    index keeps its start/end character offsets inside its paragraph, and
+    paragraph_bounds[p]:paragraph_bounds[p + 1] are the positions of paragraph
+    row p. Positions are grouped by normalised word (clean_line) in CSR form:
+    postings[postings_offsets[w]:postings_offsets[w + 1]] are the positions of
+    word id w, in text order.
+    """
+
+    def __init__(self, n_paragraphs: np.ndarray, texts: List[str]):
+        self.n_paragraphs = np.asarray(n_paragraphs)
+        self.texts = texts
+        self.vocabulary: Dict[str, int] = {}
+
+        token_ids, starts, ends = [], [], []
+        bounds = [0]
+        for text in texts:
+            for match in _TOKEN_PATTERN.finditer(text or ""):
+                word = clean_line(match.group())
+                token_ids.append(self.vocabulary.setdefault(word, len(self.vocabulary)))
+                starts.append(match.start())
+                ends.append(match.end())
+            bounds.append(len(token_ids))
+
+        self.token_ids = np.array(token_ids, dtype=np.int32)
+        self.token_starts = np.array(starts, dtype=np.int32)
+        self.token_ends = np.array(ends, dtype=np.int32)
+        self.paragraph_bounds = np.array(bounds, dtype=np.int64)
+
+        self.postings = np.argsort(self.token_ids, kind="stable").astype(np.int32)
+        counts = np.bincount(self.token_ids, minlength=len(self.vocabulary))
+        self.postings_offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.postings_offsets[1:])
+
+    @property
+    def n_tokens(self) -> int:
+        return int(self.token_ids.size)
+
+    def positions(self, word: str) -> np.ndarray:
+        """Global positions of a word after clean_line normalisation."""
+        word_id = self.vocabulary.get(clean_line(word))
+        if word_id is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.postings_offsets[word_id]:self.postings_offsets[word_id + 1]]
+
+    def count(self, word: str) -> int:
+        return int(self.positions(word).size)
+
+    def concordance(self, word: str, window: int = 8, limit: int = 1000, offset: int = 0) -> Dict[str, Any]:
+        """
+        Keyword in context for every occurrence of a word.
+
+        Args:
+            word (str): The word to look up, normalised with clean_line.
+            window (int): Tokens of context on each side. Context doesn't
+                          cross paragraph boundaries.
+            limit (int): Maximum number of occurrences returned.
+            offset (int): Occurrences to skip, for paging.
+
+        Returns:
+            Dict[str, Any]: 'total' occurrences and the requested 'lines', each
+                            with n_paragraph, the token position inside the
+                            paragraph, and left / keyword / right text.
+        """
+        positions = self.positions(word)
+        page = positions[offset:offset + limit]
+        rows = np.searchsorted(self.paragraph_bounds, page, side="right") - 1
+        first = self.paragraph_bounds[rows]
+        last = self.paragraph_bounds[rows + 1] - 1
+        left_start = np.maximum(page - window, first)
+        right_end = np.minimum(page + window, last)
+
+        lines = []
+        for position, row, left, right in zip(page.tolist(), rows.tolist(), left_start.tolist(), right_end.tolist()):
+            text = self.texts[row]
+            start, end = self.token_starts[position], self.token_ends[position]
+            lines.append({
+                "n_paragraph": int(self.n_paragraphs[row]),
+                "position": int(position - self.paragraph_bounds[row]),
+                "left": text[self.token_starts[left]:start].strip() if left < position else "",
+                "keyword": text[start:end],
+                "right": text[end:self.token_ends[right]].strip() if right > position else "",
+            })
+
+        return {"word": clean_line(word), "total": int(positions.size), "offset": offset, "lines": lines}
@@ -1,10 +1,12 @@
 #pedro_paramo_lite.operations.version_corpus.py
 
 
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Set, Optional, Union
 import numpy as np
 import ast
+from collections import OrderedDict
 
 from pedro_paramo_api.operations.sources import (
     get_complete_version,
@@ -13,8 +15,24 @@ from pedro_paramo_api.operations.sources import (
     get_metadata,
     get_versions_names
 )
-from pedro_paramo_api.operations.frequencies import get_word_freq_dict
+from pedro_paramo_api.operations.frequencies import get_word_freq_dict, clean_line
+from pedro_paramo_api.operations.singleflight import SingleFlight, single_flight
+from pedro_paramo_api.operations.spatial import UmapIndex
+from pedro_paramo_api.operations.concordance import ConcordanceIndex
+from pedro_paramo_api.operations.fuzzy import VocabularyIndex
+from pedro_paramo_api.operations.dispersion import word_timeline, word_dispersion
+from pedro_paramo_api.operations.clustering import cluster_paragraphs, remember
+from pedro_paramo_api.operations.quantization import (
+    QuantizedEmbeddings,
+    exact_cosine,
+    top_k_indices,
+    rerank,
+    memory_report,
+    recall_at_k
+)
 from pedro_paramo_api.database.ask_db import (
+    get_paragraph_arrays,
+    get_embeddings_by_paragraph,
     get_all_embeddings,
     get_all_umap_embeddings,
     get_n_paragraph,
@@ -36,6 +54,71 @@ class Corpus:
         self.n_paragraphs = version_data.get('n_paragraphs')
         self.word_set = version_data.get('word_set').split('#')
 
+        # In-memory arrays, filled by load_arrays() or by opening a snapshot
+        # (see operations/snapshot.py). While they are None every method
+        # falls back to the database.
+        self.paragraph_numbers: Optional[np.ndarray] = None
+        self.paragraph_texts: Optional[List[str]] = None
+        self.paragraph_n_words: Optional[np.ndarray] = None
+        self.embeddings: Optional[np.ndarray] = None
+        self.umap: Optional[np.ndarray] = None
+        self.freq_words: Optional[List[str]] = None
+        self.freq_counts: Optional[np.ndarray] = None
+        # Compact float16/int8 copy of the embeddings used for similarity scans.
+        self.quantized: Optional[QuantizedEmbeddings] = None
+        # quantization_report of the current quantized copy, computed once.
+        self.quantization_stats: Optional[Dict[str, Any]] = None
+        # Clustering results keyed by (k, seed).
+        self.cluster_cache: Dict[Any, Dict[str, Any]] = {}
+        # Spatial index over the UMAP coordinates, built on first use.
+        self.umap_index: Optional[UmapIndex] = None
+        # Positional token index over the paragraphs, built on first use.
+        self.concordance_index: Optional[ConcordanceIndex] = None
+        # Fuzzy lookup indexes over the vocabulary, keyed by accent_insensitive, built on first use.
+        self.fuzzy_indexes: Dict[bool, VocabularyIndex] = {}
+        # Rendered JSON bodies of large static payloads and their compressed
+        # variants, {name: {encoding: bytes}} (see routers/compression.py).
+        self.precompressed: Dict[str, Dict[str, bytes]] = {}
+        # Coalesces identical concurrent calls of the @single_flight methods.
+        self.flights = SingleFlight()
+
+    @property
+    def arrays_loaded(self) -> bool:
+        return self.paragraph_numbers is not None and self.freq_words is not None
+
+    async def load_arrays(self, session: AsyncSession) -> None:
+        """
+        Fetches paragraphs, vectors and word frequencies once and keeps them
+        in memory, so later calls don't go back to the database.
+        """
+        paragraphs = await get_paragraph_arrays(session, self.version)
+        if isinstance(paragraphs, str):
+            raise ValueError(paragraphs)
+        word_freq = await get_word_freq_dict(session, self.version)
+        if isinstance(word_freq, str):
+            raise ValueError(word_freq)
+
+        self.paragraph_numbers = paragraphs['n_paragraph']
+        self.paragraph_texts = paragraphs['text']
+        self.paragraph_n_words = paragraphs['n_words']
+        self.embeddings = paragraphs['embedding']
+        self.umap = paragraphs['umap']
+        self.freq_words = list(word_freq.keys())
+        self.freq_counts = np.fromiter(word_freq.values(), dtype=np.int64, count=len(word_freq))
+
+    def quantize(self, mode: str, keep_float32: bool = True) -> None:
+        """
+        Builds the quantized copy of the in-memory embeddings. With
+        keep_float32=False the float32 matrix is released and exact vectors
+        for re-ranking are fetched from the database instead.
+        """
+        if self.embeddings is None:
+            raise ValueError(f"Corpus for version '{self.version}' has no embeddings loaded to quantize.")
+        self.quantized = QuantizedEmbeddings.from_float32(self.embeddings, mode)
+        self.quantization_stats = None
+        if not keep_float32:
+            self.embeddings = None
+
     @classmethod
     async def create(cls, session: AsyncSession, version: str):
         """
@@ -46,40 +129,235 @@ class Corpus:
             raise ValueError(f"Version '{version}' not found in the database.")
         return cls(version=version, version_data=version_data)
 
+    @single_flight
     async def word_freq(self, session: AsyncSession) -> Dict[str, int]:
         """Retrieves word frequencies for the corpus version."""
+        if self.freq_words is not None:
+            return OrderedDict(zip(self.freq_words, self.freq_counts.tolist()))
         return await get_word_freq_dict(session, self.version)
 
-    async def int_to_word(self, session: AsyncSession) -> Dict[int, str]:
-        """Maps integer IDs to words based on word frequencies."""
-        word_freq = await self.word_freq(session)
+    async def int_to_word(self, session: AsyncSession, word_freq: Optional[Dict[str, int]] = None) -> Dict[int, str]:
+        """Maps integer IDs to words based on word frequencies (computed unless given)."""
+        if word_freq is None:
+            word_freq = await self.word_freq(session)
         return dict(zip(range(len(word_freq)), word_freq.keys()))
 
-    async def word_to_int(self, session: AsyncSession) -> Dict[str, int]:
-        """Maps words to integer IDs based on word frequencies."""
-        word_freq = await self.word_freq(session)
+    async def word_to_int(self, session: AsyncSession, word_freq: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Maps words to integer IDs based on word frequencies (computed unless given)."""
+        if word_freq is None:
+            word_freq = await self.word_freq(session)
         return dict(zip(word_freq.keys(), range(len(word_freq))))
 
+    @single_flight
     async def all_paragraphs(self, session: AsyncSession) -> Dict[int, str]:
         """Retrieves all paragraphs for the corpus version."""
-        return await get_paragraphs(session, self.version) 
+        if self.paragraph_texts is not None:
+            return dict(zip(self.paragraph_numbers.tolist(), self.paragraph_texts))
+        return await get_paragraphs(session, self.version)
 
+    @single_flight
     async def all_embeddings(self, session: AsyncSession) -> np.ndarray: 
         """Retrieves all embeddings for the corpus version."""
+        if self.embeddings is not None:
+            return self.embeddings
         return await get_all_embeddings(session, self.version)
 
+    @single_flight
     async def all_umap(self, session: AsyncSession) -> np.ndarray:
         """Retrieves all UMAP embeddings for the corpus version."""
+        if self.umap is not None:
+            return self.umap
         return await get_all_umap_embeddings(session, self.version)
 
+    @single_flight
     async def n_paragraph(self, session: AsyncSession, n_paragraph: int) -> Union[str, Any]:
         """Retrieves text for a specific paragraph number."""
         return await get_n_paragraph(session, self.version, n_paragraph)
 
+    @single_flight
     async def n_paragraph_embedding(self, session: AsyncSession, n_paragraph: int) -> Union[List[float], str]: 
         """Retrieves embedding for a specific paragraph number."""
         return await get_n_paragraph_embedding(session, self.version, n_paragraph)
 
+    @single_flight
     async def n_paragraph_umap(self, session: AsyncSession, n_paragraph: int) -> Union[List[float], str]:
         """Retrieves UMAP embedding for a specific paragraph number."""
         return await get_n_paragraph_umap(session, self.version, n_paragraph)
+
+    @single_flight
+    async def paragraph_vectors(self, session: AsyncSession):
+        """
+        Returns aligned (n_paragraph, embedding, umap) arrays, from memory when
+        they are loaded and from the database otherwise.
+        """
+        if self.paragraph_numbers is not None and self.embeddings is not None:
+            return self.paragraph_numbers, self.embeddings, self.umap
+        paragraphs = await get_paragraph_arrays(session, self.version)
+        if isinstance(paragraphs, str):
+            return paragraphs
+        return paragraphs['n_paragraph'], paragraphs['embedding'], paragraphs['umap']
+
+    @single_flight
+    async def similar_paragraphs(self, session: AsyncSession, n_paragraph: int, k: int = 10,
+                                 rerank_factor: int = 4) -> Union[List[Dict[str, Any]], str]:
+        """
+        Finds the k paragraphs of this version closest to a given one by cosine
+        similarity. With a quantized copy loaded, the scan runs over the compact
+        codes and only the top k * rerank_factor candidates are re-scored with
+        their exact float32 vectors.
+        """
+        n_paragraph = int(n_paragraph)
+        numbers, embeddings = self.paragraph_numbers, self.embeddings
+        if numbers is None:
+            vectors = await self.paragraph_vectors(session)
+            if isinstance(vectors, str):
+                return vectors
+            numbers, embeddings, _ = vectors
+
+        row = int(np.searchsorted(numbers, n_paragraph))
+        if row >= len(numbers) or numbers[row] != n_paragraph:
+            return f"this paragraph: {n_paragraph} doesn't exist"
+
+        # One extra neighbour because the paragraph itself always comes first.
+        n_results = k + 1
+        if self.quantized is not None and numbers is self.paragraph_numbers:
+            if embeddings is not None:
+                query = embeddings[row]
+            else:
+                fetched = await get_embeddings_by_paragraph(session, self.version, [n_paragraph])
+                if n_paragraph not in fetched:
+                    return f"this paragraph: {n_paragraph} doesn't exist"
+                query = fetched[n_paragraph]
+
+            candidates = top_k_indices(self.quantized.cosine(query), n_results * rerank_factor)
+            if embeddings is not None:
+                candidate_vectors = embeddings[candidates]
+            else:
+                fetched = await get_embeddings_by_paragraph(session, self.version, numbers[candidates].tolist())
+                candidates = np.array([c for c in candidates if int(numbers[c]) in fetched], dtype=np.int64)
+                candidate_vectors = np.array([fetched[int(numbers[c])] for c in candidates], dtype=np.float32)
+            indices, scores = rerank(query, candidates, candidate_vectors, n_results)
+        else:
+            all_scores = exact_cosine(embeddings, embeddings[row])
+            indices = top_k_indices(all_scores, n_results)
+            scores = all_scores[indices]
+
+        return [
+            {"n_paragraph": int(numbers[i]), "score": float(score)}
+            for i, score in zip(indices, scores) if i != row
+        ][:k]
+
+    @single_flight
+    async def quantization_report(self, session: AsyncSession) -> Union[Dict[str, Any], str]:
+        """Reports memory saved by the quantized embeddings and their recall@k against exact search."""
+        if self.quantized is None:
+            return f"Embedding quantization is disabled for version: {self.version}."
+        # The copy doesn't change until the next quantize(), and without the
+        # float32 matrix in memory every report would re-fetch the version.
+        if self.quantization_stats is not None:
+            return self.quantization_stats
+        embeddings = self.embeddings
+        if embeddings is None:
+            paragraphs = await get_paragraph_arrays(session, self.version)
+            if isinstance(paragraphs, str):
+                return paragraphs
+            embeddings = paragraphs['embedding']
+        if embeddings.shape != self.quantized.shape:
+            return f"Embeddings of version: {self.version} changed since they were quantized."
+        self.quantization_stats = {**memory_report(embeddings.shape, self.quantized), **recall_at_k(embeddings, self.quantized)}
+        return self.quantization_stats
+
+    @single_flight
+    async def clusters(self, session: AsyncSession, k: int = 20, seed: int = 0) -> Union[Dict[str, Any], str]:
+        """Groups the paragraphs of this version with mini-batch k-means over their embeddings."""
+        key = (int(k), int(seed))
+        if key in self.cluster_cache:
+            return self.cluster_cache[key]
+        vectors = await self.paragraph_vectors(session)
+        if isinstance(vectors, str):
+            return vectors
+        numbers, embeddings, umap = vectors
+        result = await cluster_paragraphs([(self.version, numbers, embeddings, umap)], k, seed)
+        return remember(self.cluster_cache, key, result)
+
+    @single_flight
+    async def get_umap_index(self, session: AsyncSession) -> Union[UmapIndex, str]:
+        """Returns the spatial index over this version's UMAP coordinates, building it once."""
+        if self.umap_index is None:
+            if self.paragraph_numbers is not None and self.umap is not None:
+                numbers, umap = self.paragraph_numbers, self.umap
+            else:
+                vectors = await self.paragraph_vectors(session)
+                if isinstance(vectors, str):
+                    return vectors
+                numbers, _, umap = vectors
+            self.umap_index = UmapIndex(numbers, umap)
+        return self.umap_index
+
+    @single_flight
+    async def get_concordance_index(self, session: AsyncSession) -> Union[ConcordanceIndex, str]:
+        """Returns the positional token index of this version, building it once."""
+        if self.concordance_index is None:
+            if self.paragraph_texts is not None:
+                numbers, texts = self.paragraph_numbers, self.paragraph_texts
+            else:
+                paragraphs = await get_paragraphs(session, self.version)
+                if not paragraphs:
+                    return f"This version: {self.version} doesn't exist or has no paragraphs."
+                numbers = np.fromiter(paragraphs.keys(), dtype=np.int32, count=len(paragraphs))
+                texts = list(paragraphs.values())
+            # Building cleans every token, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            self.concordance_index = await loop.run_in_executor(None, ConcordanceIndex, numbers, texts)
+        return self.concordance_index
+
+    async def concordance(self, session: AsyncSession, word: str, window: int = 8,
+                          limit: int = 1000, offset: int = 0) -> Union[Dict[str, Any], str]:
+        """Keyword in context for every occurrence of a word in this version."""
+        index = await self.get_concordance_index(session)
+        if isinstance(index, str):
+            return index
+        return index.concordance(word, window, limit, offset)
+
+    async def word_timeline(self, session: AsyncSession, word: str, bins: int = 50) -> Union[Dict[str, Any], str]:
+        """Occurrences of a word in `bins` equal spans of this version's text."""
+        index = await self.get_concordance_index(session)
+        if isinstance(index, str):
+            return index
+        return word_timeline(index, word, bins)
+
+    async def word_dispersion(self, session: AsyncSession, word: str) -> Union[Dict[str, Any], str]:
+        """Juilland's D and Gries' DP of a word over the paragraphs of this version."""
+        index = await self.get_concordance_index(session)
+        if isinstance(index, str):
+            return index
+        return word_dispersion(index, word)
+
+    @single_flight
+    async def get_fuzzy_index(self, session: AsyncSession, accent_insensitive: bool = False) -> Union[VocabularyIndex, str]:
+        """Returns the fuzzy lookup index over this version's vocabulary, building it once per mode."""
+        if accent_insensitive not in self.fuzzy_indexes:
+            word_freq = await self.word_freq(session)
+            if isinstance(word_freq, str):
+                return word_freq
+            # Building expands every word into its delete variants, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            self.fuzzy_indexes[accent_insensitive] = await loop.run_in_executor(
+                None, VocabularyIndex, list(word_freq.keys()), list(word_freq.values()), accent_insensitive)
+        return self.fuzzy_indexes[accent_insensitive]
+
+    async def fuzzy_words(self, session: AsyncSession, word: str, max_distance: int = 2,
+                          accent_insensitive: bool = False, limit: int = 100) -> Union[Dict[str, Any], str]:
+        """Vocabulary entries of this version within max_distance edits of a word, with their frequencies."""
+        index = await self.get_fuzzy_index(session, accent_insensitive)
+        if isinstance(index, str):
+            return index
+        word = clean_line(word)
+        matches = index.search(word, max_distance)
+        return {
+            "word": word,
+            "max_distance": max_distance,
+            "accent_insensitive": accent_insensitive,
+            "total": len(matches),
+            "matches": matches[:limit],
+        }
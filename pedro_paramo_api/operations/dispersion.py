@@ -0,0 +1,154 @@
+# pedro_paramo_api/operations/dispersion.py
+
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+from .concordance import ConcordanceIndex
+from .frequencies import clean_line
+
+# The sorted positions of a word in a ConcordanceIndex are its occurrence
+# prefix sum in inverted form: the number of occurrences before token t is
+# searchsorted(positions, t). paragraph_bounds is the prefix sum of the
+# paragraph sizes in tokens. Together they answer any "how many occurrences
+# between here and there" question with two binary searches, so nothing is
+# rescanned and no dense per-word array has to be stored.
+
+
+def _paragraph_counts(index: ConcordanceIndex, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows of the paragraphs containing the word and its count in each, in O(k log P)."""
+    rows = np.searchsorted(index.paragraph_bounds, positions, side="right") - 1
+    return np.unique(rows, return_counts=True)
+
+
+def word_timeline(index: ConcordanceIndex, word: str, bins: int = 50) -> Dict[str, Any]:
+    """
+    Occurrences of a word across the course of the text, in `bins` spans of
+    equal length in tokens. Costs O(bins log k) for k occurrences.
+
+    Returns:
+        Dict[str, Any]: 'frequency', 'n_tokens' and per bin the raw 'counts',
+                        'per_thousand' tokens and 'start_paragraph', the
+                        n_paragraph where the bin starts.
+    """
+    positions = index.positions(word)
+    n_tokens = index.n_tokens
+    edges = np.linspace(0, n_tokens, bins + 1).round().astype(np.int64)
+    counts = np.diff(np.searchsorted(positions, edges))
+    lengths = np.diff(edges)
+    per_thousand = np.divide(counts * 1000.0, lengths, out=np.zeros(bins), where=lengths > 0)
+    start_rows = np.searchsorted(index.paragraph_bounds, edges[:-1], side="right") - 1
+    start_rows = np.clip(start_rows, 0, max(len(index.n_paragraphs) - 1, 0))
+
+    return {
+        "word": clean_line(word),
+        "frequency": int(positions.size),
+        "n_tokens": n_tokens,
+        "bins": bins,
+        "counts": counts.tolist(),
+        "per_thousand": per_thousand.round(4).tolist(),
+        "start_paragraph": index.n_paragraphs[start_rows].tolist() if len(index.n_paragraphs) else [],
+    }
+
+
+def word_dispersion(index: ConcordanceIndex, word: str) -> Dict[str, Any]:
+    """
+    Dispersion of a word over the paragraphs of one version, taking each
+    non-empty paragraph as a corpus part. Only the parts containing the word
+    are visited: the empty ones enter the sums in closed form.
+
+    - Juilland's D = 1 - V / sqrt(n - 1), V the coefficient of variation of
+      the word's relative frequency in the n parts. 1 is perfectly even.
+    - Gries' DP = 0.5 * sum |v_i / f - s_i|, v_i the occurrences in part i,
+      f the total and s_i the share of the text in part i. 0 is perfectly
+      even; DP_norm divides it by its maximum, 1 - min(s_i)
+      (Lijffijt & Gries, 2012).
+
+    Returns:
+        Dict[str, Any]: 'frequency', 'n_parts', 'range' (parts containing the
+                        word), 'juilland_d', 'gries_dp' and 'gries_dp_norm'.
+                        The metrics are None when the word doesn't occur.
+    """
+    positions = index.positions(word)
+    sizes = np.diff(index.paragraph_bounds).astype(np.float64)
+    n_parts = int(np.count_nonzero(sizes))
+    frequency = int(positions.size)
+    result = {
+        "word": clean_line(word),
+        "frequency": frequency,
+        "n_parts": n_parts,
+        "range": 0,
+        "juilland_d": None,
+        "gries_dp": None,
+        "gries_dp_norm": None,
+    }
+    if frequency == 0 or n_parts == 0:
+        return result
+
+    rows, counts = _paragraph_counts(index, positions)
+    result["range"] = int(rows.size)
+
+    # Gries' DP: the parts without the word contribute their whole share s_i.
+    shares = sizes[rows] / sizes.sum()
+    dp = 0.5 * (np.abs(counts / frequency - shares).sum() + (1.0 - shares.sum()))
+    min_share = sizes[sizes > 0].min() / sizes.sum()
+    result["gries_dp"] = float(dp)
+    result["gries_dp_norm"] = float(dp / (1.0 - min_share)) if min_share < 1.0 else 0.0
+
+    # Juilland's D on relative frequencies: zeros add nothing to the sums.
+    if n_parts > 1:
+        relative = counts / sizes[rows]
+        mean = relative.sum() / n_parts
+        variance = max((relative ** 2).sum() / n_parts - mean ** 2, 0.0)
+        result["juilland_d"] = float(1.0 - np.sqrt(variance) / mean / np.sqrt(n_parts - 1))
+    return result
+
+
+def paragraph_distribution(index: ConcordanceIndex, word: str) -> Dict[int, int]:
+    """n_paragraph -> occurrences of the word, only for the paragraphs containing it."""
+    rows, counts = _paragraph_counts(index, index.positions(word))
+    return dict(zip(index.n_paragraphs[rows].tolist(), counts.tolist()))
+
+
+def compare_distributions(terms: List[Tuple[str, ConcordanceIndex, str]]) -> Dict[str, Any]:
+    """
+    Compares how the translations of a word are spread over the aligned
+    paragraphs of several versions. For every pair the divergence is
+    0.5 * sum |p_i - q_i| over the paragraph numbers both versions have,
+    p and q being each term's share of its occurrences in paragraph i: the
+    DP of one term against the other instead of against the text. 0 means
+    the translations occur in the same places in the same proportions, 1
+    that they never share a paragraph.
+
+    Args:
+        terms: (version_name, concordance index, word) per term.
+
+    Returns:
+        Dict[str, Any]: Each term's dispersion and the pairwise 'divergence'.
+    """
+    distributions = []
+    for version, index, word in terms:
+        distributions.append((version, clean_line(word), index, paragraph_distribution(index, word)))
+
+    pairs = []
+    for i in range(len(distributions)):
+        for j in range(i + 1, len(distributions)):
+            version_a, word_a, index_a, counts_a = distributions[i]
+            version_b, word_b, index_b, counts_b = distributions[j]
+            shared = set(index_a.n_paragraphs.tolist()) & set(index_b.n_paragraphs.tolist())
+            total_a = sum(count for n, count in counts_a.items() if n in shared)
+            total_b = sum(count for n, count in counts_b.items() if n in shared)
+            divergence: Optional[float] = None
+            if total_a and total_b:
+                paragraphs = (set(counts_a) | set(counts_b)) & shared
+                divergence = 0.5 * sum(abs(counts_a.get(n, 0) / total_a - counts_b.get(n, 0) / total_b) for n in paragraphs)
+            pairs.append({
+                "a": {"version": version_a, "word": word_a},
+                "b": {"version": version_b, "word": word_b},
+                "shared_paragraphs": len(shared),
+                "divergence": divergence,
+            })
+
+    return {
+        "terms": [{"version": version, **word_dispersion(index, word)} for version, word, index, _ in distributions],
+        "pairs": pairs,
+    }
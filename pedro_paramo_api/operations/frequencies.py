@@ -5,9 +5,11 @@ from typing import Dict, Any, List, Union
 import re
 from collections import OrderedDict, Counter
 import unicodedata
-# Assuming open_request is defined in ask_db.py
-from ..database.ask_db import open_request
+# Every read goes through the configured storage backend (Postgres or SQLite)
+from ..database.storage import get_backend
+from ..profiling import profiled
 
+@profiled("clean_line")
 def clean_line(string: str = None) -> str:
     apostrophes = {"'", "’", "`"}
     
@@ -37,18 +39,12 @@ async def get_n_words(session: AsyncSession, version: str) -> Union[int, str]:
         Union[int, str]: The number of words, or an error message if the version
                          doesn't exist or has no raw text.
     """
-    data = await open_request(session, # Pass the session here
-                              """
-                              SELECT version.raw_text FROM version
-                              WHERE version.version_name = :version
-                              """,
-                              params={"version": version},
-                              fetch_as_dict=True)
-
-    if not data or not data[0] or 'raw_text' not in data[0]:
+    data = await get_backend().version_columns(session, version, ["raw_text"])
+
+    if not data or data['raw_text'] is None:
         return f"This version: {version} doesn't exist or has no raw text."
 
-    text = data[0]['raw_text']
+    text = data['raw_text']
     n_words = len(text.split(' ')) # Simple word count by splitting on space
 
     return n_words
@@ -66,19 +62,13 @@ async def get_paragraph_words_freq(session: AsyncSession, version: str) -> Union
         Union[Dict[int, int], str]: A dictionary mapping paragraph numbers to their
                                     word counts, or an error message.
     """
-    data = await open_request(session, # Pass the session here
-                              """
-                              SELECT n_paragraph, paragraph.n_words FROM paragraph
-                              WHERE paragraph.version_name = :version
-                              """,
-                              params={"version": version},
-                              fetch_as_dict=True)
-
-    if not data:
+    data = await get_backend().paragraph_columns(session, version, ["n_paragraph", "n_words"])
+
+    if not data["n_paragraph"]:
         return f"No paragraphs found for version: {version}."
 
-    # Create a dictionary from the list of dictionaries
-    versions = {x['n_paragraph']: x['n_words'] for x in data}
+    # (n_paragraph, n_words) columns map straight onto the dictionary
+    versions = dict(zip(data["n_paragraph"], data["n_words"]))
 
     return versions
 
@@ -99,18 +89,12 @@ async def get_word_freq_dict(session: AsyncSession, version_name: str) -> Union[
                                  in descending order, or an error message.
     """
 
-    query = """
-        SELECT version.raw_text FROM version
-        WHERE version.version_name = :v_n;
-    """
-
-    # open_request is expected to return a list of tuples, e.g., [('full raw text string',)]
-    data = await open_request(session, query, params={"v_n": version_name}) # Pass the session here
+    data = await get_backend().version_columns(session, version_name, ["raw_text"])
 
-    if not data or not data[0] or not data[0][0]:
+    if not data or not data["raw_text"]:
         return f"This version: {version_name} doesn't exist or has no raw text data."
 
-    raw_text_string = data[0][0] # Get the full raw text string from the query result
+    raw_text_string = data["raw_text"] # The full raw text string of the version
 
     # Basic word cleaning: replace '#' with space and split
     words_from_text = raw_text_string.replace('#', ' ').split(' ')
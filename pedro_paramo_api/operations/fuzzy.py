@@ -0,0 +1,152 @@
+# pedro_paramo_api/operations/fuzzy.py
+
+import unicodedata
+from typing import Any, Dict, List, Sequence, Set, Union
+
+# Edit distance the index is built for. Every extra edit multiplies the
+# number of stored delete variants (about 20 MB per 10k words at 2).
+MAX_FUZZY_DISTANCE = 2
+
+
+def fold_accents(word: str) -> str:
+    """Lowercases a word and strips its diacritics: 'Comala' and 'cómala' both give 'comala'."""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def levenshtein(a: str, b: str, max_distance: int = None) -> int:
+    """
+    Edit distance (insertions, deletions, substitutions) between two words,
+    with two rows of the DP table. With max_distance it stops as soon as the
+    distance is known to exceed it and returns max_distance + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def delete_variants(word: str, max_distance: int) -> Set[str]:
+    """The word and every string obtained by deleting up to max_distance of its characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class VocabularyIndex:
+    """
+    Symmetric-delete index over the vocabulary of one version. Two words are
+    within d edits only if deleting at most d characters from each gives a
+    common string, so every delete variant of every key is stored once and
+    a query only verifies the keys sharing a variant with it, instead of
+    computing the distance to the whole vocabulary.
+
+    A key is the word itself, or its accent-folded form; folding can merge
+    several words into one key, which keeps all of them.
+    """
+
+    def __init__(self, words: Sequence[str], counts: Sequence[int], accent_insensitive: bool = False,
+                 max_distance: int = MAX_FUZZY_DISTANCE):
+        self.accent_insensitive = accent_insensitive
+        self.max_distance = max_distance
+        self.words = list(words)
+        self.counts = [int(count) for count in counts]
+        self.keys: List[str] = []
+        self.key_words: List[List[int]] = []
+        # Delete variant -> key id, or list of key ids when several share it
+        # (most variants belong to a single key, so no list for those).
+        self.variants: Dict[str, Union[int, List[int]]] = {}
+
+        key_ids: Dict[str, int] = {}
+        for word_id, word in enumerate(self.words):
+            key = self.normalise(word)
+            if not key:
+                continue
+            if key in key_ids:
+                self.key_words[key_ids[key]].append(word_id)
+                continue
+            key_id = key_ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.key_words.append([word_id])
+            for variant in delete_variants(key, max_distance):
+                entry = self.variants.get(variant)
+                if entry is None:
+                    self.variants[variant] = key_id
+                elif isinstance(entry, int):
+                    self.variants[variant] = [entry, key_id]
+                else:
+                    entry.append(key_id)
+
+    def normalise(self, word: str) -> str:
+        return fold_accents(word) if self.accent_insensitive else word
+
+    def search(self, word: str, max_distance: int = 2) -> List[Dict[str, Any]]:
+        """
+        Vocabulary entries within max_distance edits of a word.
+
+        Returns:
+            List[Dict[str, Any]]: 'word', 'distance' and 'frequency' of every
+                                  match, closest first, then most frequent.
+        """
+        if max_distance > self.max_distance:
+            raise ValueError(f"This index answers up to {self.max_distance} edits, not {max_distance}.")
+        query = self.normalise(word)
+        matches = []
+        if not query:
+            return matches
+
+        candidates = set()
+        for variant in delete_variants(query, max_distance):
+            entry = self.variants.get(variant)
+            if entry is None:
+                continue
+            if isinstance(entry, int):
+                candidates.add(entry)
+            else:
+                candidates.update(entry)
+
+        for key_id in candidates:
+            distance = levenshtein(query, self.keys[key_id], max_distance)
+            if distance <= max_distance:
+                for word_id in self.key_words[key_id]:
+                    matches.append({"word": self.words[word_id], "distance": distance, "frequency": self.counts[word_id]})
+
+        matches.sort(key=lambda match: (match["distance"], -match["frequency"], match["word"]))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def brute_force_search(words: Sequence[str], counts: Sequence[int], word: str, max_distance: int = 2,
+                       accent_insensitive: bool = False) -> List[Dict[str, Any]]:
+    """Reference scan comparing the word with every vocabulary entry, same output as VocabularyIndex.search."""
+    normalise = fold_accents if accent_insensitive else (lambda w: w)
+    query = normalise(word)
+    matches = []
+    if not query:
+        return matches
+    for candidate, count in zip(words, counts):
+        key = normalise(candidate)
+        if not key:
+            continue
+        distance = levenshtein(query, key, max_distance)
+        if distance <= max_distance:
+            matches.append({"word": candidate, "distance": distance, "frequency": int(count)})
+    matches.sort(key=lambda match: (match["distance"], -match["frequency"], match["word"]))
+    return matches
@@ -0,0 +1,120 @@
+# pedro_paramo_api/operations/projection.py
+
+import hashlib
+import asyncio
+import functools
+from typing import Dict, Any, List, Tuple
+import numpy as np
+
+from .clustering import get_cluster_executor, normalize_rows
+
+
+def randomized_pca(X: np.ndarray,
+                   dims: int,
+                   seed: int = 0,
+                   n_oversamples: int = 10,
+                   n_power_iter: int = 4) -> Dict[str, Any]:
+    """
+    Principal components of X with the randomized SVD of Halko, Martinsson
+    and Tropp (2011): the centred matrix is multiplied by a thin Gaussian
+    matrix, a few power iterations (re-orthonormalised with QR) sharpen the
+    spectrum, and the exact SVD of the small projected matrix gives the top
+    components. Costs O(n * d * (dims + n_oversamples)) instead of a full SVD.
+
+    Args:
+        X (np.ndarray): (n, d) float32 matrix.
+        dims (int): Number of components (capped at min(n, d)).
+        seed (int): Seed of the random test matrix.
+        n_oversamples (int): Extra random directions, for accuracy.
+        n_power_iter (int): Power iterations.
+
+    Returns:
+        Dict[str, Any]: 'coordinates' (n, dims), 'components' (dims, d),
+                        'mean' (d,) and 'explained_variance_ratio' (dims,).
+                        Component signs are fixed so that the largest
+                        loading of each is positive, which keeps results
+                        deterministic.
+    """
+    n, d = X.shape
+    dims = max(1, min(dims, n, d))
+    mean = X.mean(axis=0)
+    centred = X - mean
+
+    rng = np.random.default_rng(seed)
+    width = min(dims + n_oversamples, n, d)
+    Q = np.linalg.qr(centred @ rng.standard_normal((d, width)).astype(np.float32))[0]
+    for _ in range(n_power_iter):
+        Q = np.linalg.qr(centred.T @ Q)[0]
+        Q = np.linalg.qr(centred @ Q)[0]
+
+    _, singular_values, components = np.linalg.svd(Q.T @ centred, full_matrices=False)
+    components = components[:dims]
+    singular_values = singular_values[:dims]
+    signs = np.sign(components[np.arange(dims), np.abs(components).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    components = components * signs[:, None]
+
+    total_variance = float(np.einsum("ij,ij->", centred, centred))
+    explained = singular_values ** 2 / total_variance if total_variance > 0 else np.zeros(dims)
+    return {
+        "coordinates": centred @ components.T,
+        "components": components,
+        "mean": mean,
+        "explained_variance_ratio": explained,
+    }
+
+
+def subset_hash(version_names: List[str], numbers: List[np.ndarray]) -> str:
+    """Digest of the exact (version, n_paragraph) rows selected, whatever filter selected them."""
+    digest = hashlib.sha1()
+    for version_name, version_numbers in zip(version_names, numbers):
+        digest.update(version_name.encode())
+        digest.update(b"\0")
+        digest.update(np.ascontiguousarray(version_numbers, dtype=np.int64).tobytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _project(inputs: List[Tuple[str, np.ndarray, np.ndarray]], dims: int, seed: int) -> Dict[str, Any]:
+    versions = np.concatenate([np.full(len(numbers), i, dtype=np.int32) for i, (_, numbers, _) in enumerate(inputs)])
+    numbers = np.concatenate([numbers for _, numbers, _ in inputs])
+    # Unit rows, so distances in the projection follow cosine similarity
+    X = normalize_rows(np.concatenate([embeddings for _, _, embeddings in inputs]))
+    version_names = [name for name, _, _ in inputs]
+
+    result = randomized_pca(X, dims, seed)
+    return {
+        "dims": int(result["components"].shape[0]),
+        "seed": seed,
+        "explained_variance_ratio": result["explained_variance_ratio"].tolist(),
+        # Columnar, like the cluster labels
+        "paragraphs": {
+            "version": [version_names[v] for v in versions.tolist()],
+            "n_paragraph": numbers.tolist(),
+            "coordinates": result["coordinates"].tolist(),
+        },
+    }
+
+
+async def project_paragraphs(inputs: List[Tuple[str, np.ndarray, np.ndarray]],
+                             dims: int,
+                             seed: int = 0) -> Dict[str, Any]:
+    """
+    Projects the paragraphs of one or more versions into one shared
+    low-dimensional space, in the clustering pool.
+
+    Args:
+        inputs: One (version_name, n_paragraph array, embedding matrix) tuple
+                per version, rows aligned.
+        dims (int): 2 or 3.
+        seed (int): Random seed, results are deterministic for a given seed.
+
+    Returns:
+        Dict[str, Any]: The explained variance ratio of each axis and the
+                        coordinates of every paragraph.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_cluster_executor(),
+        functools.partial(_project, inputs, dims, seed)
+    )
@@ -0,0 +1,179 @@
+# pedro_paramo_api/operations/quantization.py
+
+import os
+from typing import Dict, Any, Optional
+import numpy as np
+
+QUANTIZATION_MODES = ("float16", "int8")
+
+# Rows scored per matmul when scanning, so the float32 upcast of the codes
+# never needs more than a few MB at once.
+_SCAN_CHUNK_ROWS = 4096
+
+
+def get_quantization_mode() -> Optional[str]:
+    """
+    Returns the embedding quantization mode from EMBEDDING_QUANTIZATION
+    ('float16' or 'int8'), or None when quantization is disabled.
+    """
+    mode = os.getenv("EMBEDDING_QUANTIZATION")
+    if not mode:
+        return None
+    mode = mode.lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"EMBEDDING_QUANTIZATION must be one of {QUANTIZATION_MODES}, got '{mode}'.")
+    return mode
+
+
+class QuantizedEmbeddings:
+    """
+    Compact copy of an embedding matrix used for similarity scans.
+
+    'float16' halves the memory of the float32 matrix. 'int8' quarters it,
+    storing every dimension as round(x / scale) with one float32 scale per
+    dimension (max |x| of that dimension / 127). Row norms are kept from the
+    original float32 vectors so cosine scores don't pick up the rounding error
+    twice.
+    """
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray], norms: np.ndarray, mode: str):
+        self.codes = codes
+        self.scales = scales
+        self.norms = norms
+        self.mode = mode
+
+    @classmethod
+    def from_float32(cls, embeddings: np.ndarray, mode: str) -> "QuantizedEmbeddings":
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode '{mode}', use one of {QUANTIZATION_MODES}.")
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1).astype(np.float32)
+
+        if mode == "float16":
+            return cls(embeddings.astype(np.float16), None, norms, mode)
+
+        scales = np.abs(embeddings).max(axis=0) / 127.0
+        scales[scales == 0] = 1.0
+        scales = scales.astype(np.float32)
+        codes = np.clip(np.rint(embeddings / scales), -127, 127).astype(np.int8)
+        return cls(codes, scales, norms, mode)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        scales_bytes = self.scales.nbytes if self.scales is not None else 0
+        return self.codes.nbytes + scales_bytes + self.norms.nbytes
+
+    def dot(self, query: np.ndarray) -> np.ndarray:
+        """Approximate dot product of every row with a float32 query vector."""
+        query = np.asarray(query, dtype=np.float32)
+        if self.scales is not None:
+            # (codes * scales) @ q == codes @ (scales * q)
+            query = query * self.scales
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], _SCAN_CHUNK_ROWS):
+            chunk = self.codes[start:start + _SCAN_CHUNK_ROWS]
+            out[start:start + chunk.shape[0]] = chunk.astype(np.float32) @ query
+        return out
+
+    def cosine(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of every row with a query vector."""
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+        norms = np.where(self.norms == 0, 1.0, self.norms)
+        return self.dot(query) / (norms * query_norm)
+
+
+def exact_cosine(embeddings: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Exact float32 cosine similarity of every row of a matrix with a query vector."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1)
+    norms[norms == 0] = 1.0
+    return (embeddings @ query) / (norms * (np.linalg.norm(query) or 1.0))
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def rerank(query: np.ndarray, candidate_indices: np.ndarray, candidate_vectors: np.ndarray, k: int):
+    """
+    Re-scores approximate candidates with their exact float32 vectors.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The k best row indices and their exact
+                                       cosine scores, best first.
+    """
+    scores = exact_cosine(candidate_vectors, query)
+    order = top_k_indices(scores, k)
+    return candidate_indices[order], scores[order]
+
+
+def memory_report(embeddings_shape, quantized: QuantizedEmbeddings) -> Dict[str, Any]:
+    """Bytes of the float32 matrix against its quantized copy."""
+    float32_bytes = int(np.prod(embeddings_shape)) * 4
+    quantized_bytes = quantized.nbytes
+    return {
+        "mode": quantized.mode,
+        "float32_bytes": float32_bytes,
+        "quantized_bytes": quantized_bytes,
+        "saved_bytes": float32_bytes - quantized_bytes,
+        "compression_ratio": round(float32_bytes / quantized_bytes, 3) if quantized_bytes else None,
+    }
+
+
+def recall_at_k(embeddings: np.ndarray,
+                quantized: QuantizedEmbeddings,
+                k: int = 10,
+                n_queries: int = 100,
+                rerank_factor: int = 4,
+                seed: int = 0) -> Dict[str, Any]:
+    """
+    Measures how many of the exact top-k neighbours the quantized scan finds,
+    using a random sample of the paragraphs themselves as queries.
+
+    Args:
+        embeddings (np.ndarray): The exact float32 matrix the codes were built from.
+        quantized (QuantizedEmbeddings): The compact copy to evaluate.
+        k (int): Number of neighbours compared per query.
+        n_queries (int): Number of sampled query paragraphs.
+        rerank_factor (int): Candidates taken from the quantized scan per
+                             neighbour before the exact re-rank.
+        seed (int): Seed for the query sample.
+
+    Returns:
+        Dict[str, Any]: recall@k of the quantized scan alone and after the
+                        exact float32 re-rank.
+    """
+    n_rows = embeddings.shape[0]
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(n_rows, size=min(n_queries, n_rows), replace=False)
+
+    hits_approx = 0
+    hits_reranked = 0
+    for row in queries:
+        query = embeddings[row]
+        exact = set(top_k_indices(exact_cosine(embeddings, query), k).tolist())
+        approx_scores = quantized.cosine(query)
+        hits_approx += len(exact.intersection(top_k_indices(approx_scores, k).tolist()))
+        candidates = top_k_indices(approx_scores, k * rerank_factor)
+        reranked, _ = rerank(query, candidates, embeddings[candidates], k)
+        hits_reranked += len(exact.intersection(reranked.tolist()))
+
+    total = len(queries) * min(k, n_rows)
+    return {
+        "k": k,
+        "n_queries": int(len(queries)),
+        "rerank_factor": rerank_factor,
+        "recall_quantized": hits_approx / total if total else None,
+        "recall_reranked": hits_reranked / total if total else None,
+    }
@@ -0,0 +1,62 @@
+# pedro_paramo_api/operations/singleflight.py
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the
+    leader) starts the work, everyone arriving while it runs awaits the same
+    future and gets the same result or exception.
+
+    The work runs with the leader's database session, so if the leader is
+    cancelled (e.g. its client went away and its session is about to close)
+    the work is cancelled too, and the callers still waiting retry: one of
+    them becomes the new leader with its own session. A waiter that is
+    cancelled itself just stops waiting.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def do(self, key: Hashable, make_coroutine: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            task = self._inflight.get(key)
+            leader = task is None
+            if leader:
+                task = asyncio.ensure_future(make_coroutine())
+                self._inflight[key] = task
+                task.add_done_callback(functools.partial(self._forget, key))
+            try:
+                # shield: a waiter being cancelled must not cancel the shared work
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if leader:
+                    task.cancel()
+                    raise
+                if task.cancelled():
+                    # The leader was cancelled, not us: run it again.
+                    continue
+                raise
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+def single_flight(method):
+    """
+    Decorator for async Corpus methods taking (self, session, *args). Calls on
+    the same instance with the same arguments share one execution; the session
+    is not part of the key.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, session, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return await self.flights.do(key, lambda: method(self, session, *args, **kwargs))
+    return wrapper
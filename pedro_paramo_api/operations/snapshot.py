@@ -0,0 +1,179 @@
+# pedro_paramo_api/operations/snapshot.py
+
+import os
+import io
+import json
+import mmap
+import struct
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+from .corpus import Corpus
+
+# File layout:
+#   fixed header  -> magic, format version, crc32 of everything after it,
+#                    length of the JSON index, offset of the data section
+#   JSON index    -> content hash, per version metadata and array locations
+#   data section  -> raw little-endian array buffers, each 64-byte aligned
+# Arrays are read back with np.frombuffer straight over the mmap, so opening
+# a snapshot doesn't copy or parse them: the OS pages them in when touched.
+SNAPSHOT_MAGIC = b"PPSNAP\x00\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")
+_ALIGNMENT = 64
+
+# Plain attributes that go into the JSON index as they are.
+_METADATA_FIELDS = ("author", "year", "editorial", "ISBN", "metadata", "n_words", "n_paragraphs")
+
+# Corpus attributes stored as numeric arrays.
+_ARRAY_FIELDS = ("paragraph_numbers", "paragraph_n_words", "embeddings", "umap", "freq_counts")
+
+# Corpus attributes stored as a list of strings (utf-8 buffer + offsets).
+_STRING_LIST_FIELDS = ("paragraph_texts", "freq_words", "word_set")
+
+
+def get_snapshot_path() -> Optional[str]:
+    """Returns the snapshot path from CORPUS_SNAPSHOT_PATH, or None when disabled."""
+    return os.getenv("CORPUS_SNAPSHOT_PATH") or None
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(buffer: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = buffer.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def write_snapshot(path: str, corpora: Dict[str, Corpus], content_hash: str) -> None:
+    """
+    Serializes the in-memory state of every Corpus to a single snapshot file.
+    The file is written next to the target and renamed into place, so a
+    server opening the path never sees a half-written snapshot.
+
+    Args:
+        path (str): Where to write the snapshot.
+        corpora (Dict[str, Corpus]): The corpus cache, keyed by version name.
+                                     Every instance must have its arrays loaded.
+        content_hash (str): The database fingerprint the snapshot was built from
+                            (see ask_db.get_content_hash).
+    """
+    data = io.BytesIO()
+    index: Dict[str, Any] = {"content_hash": content_hash, "versions": {}}
+
+    def add_array(array: np.ndarray) -> Dict[str, Any]:
+        padding = (-data.tell()) % _ALIGNMENT
+        data.write(b"\x00" * padding)
+        array = np.ascontiguousarray(array)
+        entry = {"offset": data.tell(), "dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape)}
+        data.write(array.astype(entry["dtype"], copy=False).tobytes())
+        return entry
+
+    for version, corpus in corpora.items():
+        if not corpus.arrays_loaded:
+            raise ValueError(f"Corpus for version '{version}' has no arrays loaded, can't snapshot it.")
+        if corpus.embeddings is None:
+            raise ValueError(f"Corpus for version '{version}' dropped its float32 embeddings, can't snapshot it.")
+
+        entry = {field: getattr(corpus, field) for field in _METADATA_FIELDS}
+        arrays = {field: add_array(getattr(corpus, field)) for field in _ARRAY_FIELDS}
+        for field in _STRING_LIST_FIELDS:
+            buffer, offsets = _encode_strings(getattr(corpus, field))
+            arrays[f"{field}.buffer"] = add_array(buffer)
+            arrays[f"{field}.offsets"] = add_array(offsets)
+        text_buffer, _ = _encode_strings([corpus.text])
+        arrays["text"] = add_array(text_buffer)
+        entry["arrays"] = arrays
+        index["versions"][version] = entry
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    data_offset = _HEADER.size + len(index_bytes)
+    data_offset += (-data_offset) % _ALIGNMENT
+    body = index_bytes + b"\x00" * (data_offset - _HEADER.size - len(index_bytes)) + data.getvalue()
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, zlib.crc32(body), len(index_bytes), data_offset)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def open_snapshot(path: str, content_hash: str, verify_checksum: bool = True) -> Optional[Dict[str, Corpus]]:
+    """
+    Opens a snapshot file with mmap and rebuilds the Corpus cache on top of it.
+    Numeric arrays are zero-copy views of the mapping.
+
+    Args:
+        path (str): The snapshot file.
+        content_hash (str): The current database fingerprint. A snapshot built
+                            from different data is considered stale.
+        verify_checksum (bool): Check the crc32 of the file before using it.
+
+    Returns:
+        Optional[Dict[str, Corpus]]: The corpus cache keyed by version name, or
+                                     None if the file is missing, corrupt,
+                                     from another format version or stale.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            return None
+
+    if len(mapped) < _HEADER.size:
+        print(f"Snapshot {path} is truncated, ignoring it.")
+        return None
+
+    magic, format_version, checksum, index_len, data_offset = _HEADER.unpack_from(mapped, 0)
+    if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+        print(f"Snapshot {path} has an unknown format, ignoring it.")
+        return None
+    if verify_checksum and zlib.crc32(memoryview(mapped)[_HEADER.size:]) != checksum:
+        print(f"Snapshot {path} failed its checksum, ignoring it.")
+        return None
+
+    index = json.loads(mapped[_HEADER.size:_HEADER.size + index_len])
+    if index.get("content_hash") != content_hash:
+        print(f"Snapshot {path} is stale (database content changed), ignoring it.")
+        return None
+
+    def view(entry: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        array = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_offset + entry["offset"])
+        return array.reshape(entry["shape"])
+
+    corpora = {}
+    for version, entry in index["versions"].items():
+        arrays = entry["arrays"]
+        version_data = {
+            "author": entry["author"],
+            "year": entry["year"],
+            "editorial": entry["editorial"],
+            "ISBN": entry["ISBN"],
+            "version_data": entry["metadata"],
+            "raw_text": view(arrays["text"]).tobytes().decode("utf-8"),
+            "n_words": entry["n_words"],
+            "n_paragraphs": entry["n_paragraphs"],
+            "word_set": "#".join(_decode_strings(view(arrays["word_set.buffer"]), view(arrays["word_set.offsets"]))),
+        }
+        corpus = Corpus(version=version, version_data=version_data)
+        for field in _ARRAY_FIELDS:
+            setattr(corpus, field, view(arrays[field]))
+        corpus.paragraph_texts = _decode_strings(view(arrays["paragraph_texts.buffer"]), view(arrays["paragraph_texts.offsets"]))
+        corpus.freq_words = _decode_strings(view(arrays["freq_words.buffer"]), view(arrays["freq_words.offsets"]))
+        corpora[version] = corpus
+
+    return corpora
@@ -3,8 +3,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any, List, Union
 
-# Assuming open_request is defined in ask_db.py
-from ..database.ask_db import open_request
+# Every read goes through the configured storage backend (Postgres or SQLite)
+from ..database.storage import get_backend
 
 # Assuming your Version model is defined in models.py
 # This import is kept for consistency, even if not directly used by these specific functions.
@@ -21,8 +21,8 @@ async def get_versions_names(session: AsyncSession) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: A list of dictionaries, each containing a 'version_name'.
     """
-    versions = await open_request(session, "select version_name from version", fetch_as_dict=True)
-    return versions
+    version_names = await get_backend().version_names(session)
+    return [{"version_name": version_name} for version_name in version_names]
 
 
 async def get_raw_text(session: AsyncSession, version: str) -> Optional[Dict[str, Any]]:
@@ -37,14 +37,7 @@ async def get_raw_text(session: AsyncSession, version: str) -> Optional[Dict[str
         Optional[Dict[str, Any]]: A dictionary containing the 'raw_text' if found,
                                   otherwise None.
     """
-    data = await open_request(session,
-                              """
-                              SELECT raw_text FROM version
-                              WHERE version.version_name = :version_name
-                              """,
-                              params={"version_name": version},
-                              fetch_as_dict=True)
-    return data[0] if data else None
+    return await get_backend().version_columns(session, version, ["raw_text"])
 
 
 async def get_paragraphs(session: AsyncSession, version: str) -> Dict[int, str]:
@@ -59,24 +52,11 @@ async def get_paragraphs(session: AsyncSession, version: str) -> Dict[int, str]:
         Dict[int, str]: A dictionary where keys are paragraph numbers (int)
                         and values are paragraph text (str).
     """
-    data = await open_request(session,
-                              """
-                              SELECT n_paragraph, text FROM paragraph
-                              WHERE version_name = :version_name
-                              """,
-                              params={"version_name": version},
-                              fetch_as_dict=True)
+    data = await get_backend().paragraph_columns(session, version, ["n_paragraph", "text"])
 
-    if not data:
-        return {} # Return an empty dictionary if no data is found
-
-    # Sort the list of dictionaries by n_paragraph
-    sorted_data = sorted(data, key=lambda x: x["n_paragraph"])
-
-    # Create the dictionary from the sorted list
-    result_dict = {x["n_paragraph"]: x["text"] for x in sorted_data}
-
-    return result_dict
+    # Columns are already sorted by n_paragraph, so they become the
+    # dictionary directly without an intermediate dict per row.
+    return dict(zip(data["n_paragraph"], data["text"]))
 
 
 async def get_metadata(session: AsyncSession, version: str) -> Optional[Dict[str, Any]]:
@@ -91,14 +71,7 @@ async def get_metadata(session: AsyncSession, version: str) -> Optional[Dict[str
         Optional[Dict[str, Any]]: A dictionary containing the 'version_data' if found,
                                   otherwise None.
     """
-    data = await open_request(session,
-                              """
-                              SELECT version_data FROM version
-                              WHERE version.version_name = :version_name
-                              """,
-                              params={"version_name": version},
-                              fetch_as_dict=True)
-    return data[0] if data else None
+    return await get_backend().version_columns(session, version, ["version_data"])
 
 
 async def get_complete_version(session: AsyncSession, version_name: str) -> Optional[Dict[str, Any]]:
@@ -113,11 +86,4 @@ async def get_complete_version(session: AsyncSession, version_name: str) -> Opti
         Optional[Dict[str, Any]]: A dictionary containing all version data if found,
                                   otherwise None.
     """
-    data = await open_request(session,
-                              """
-                              SELECT * FROM version
-                              WHERE version.version_name = :version_name
-                              """,
-                              params={"version_name": version_name},
-                              fetch_as_dict=True)
-    return data[0] if data else None
+    return await get_backend().version_columns(session, version_name)
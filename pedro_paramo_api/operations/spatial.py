@@ -0,0 +1,188 @@
+# pedro_paramo_api/operations/spatial.py
+
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Cells per axis are capped so the offsets table stays small (64^3 cells is
+# 2 MB of int64) whatever the number of points.
+MAX_CELLS_PER_AXIS = 64
+TARGET_POINTS_PER_CELL = 4
+# Finest grid used to build level-of-detail subsamples.
+MAX_LOD_CELLS_PER_AXIS = 256
+
+
+class GridIndex:
+    """
+    Uniform grid over a set of points. Points are sorted by cell so each cell
+    is a contiguous slice, and cell_starts[c]:cell_starts[c + 1] gives it.
+    A box query only touches the cells overlapping the box, then filters the
+    points of those cells exactly.
+    """
+
+    def __init__(self, points: np.ndarray, cells_per_axis: Optional[int] = None):
+        points = np.asarray(points, dtype=np.float32)
+        n, dims = points.shape
+        if cells_per_axis is None:
+            cells_per_axis = int(round((max(n, 1) / TARGET_POINTS_PER_CELL) ** (1.0 / dims)))
+        self.cells_per_axis = int(np.clip(cells_per_axis, 1, MAX_CELLS_PER_AXIS))
+        self.dims = dims
+        self.lo = points.min(axis=0) if n else np.zeros(dims, dtype=np.float32)
+        self.hi = points.max(axis=0) if n else np.zeros(dims, dtype=np.float32)
+        span = self.hi - self.lo
+        self.cell_size = np.where(span > 0, span / self.cells_per_axis, 1.0).astype(np.float32)
+
+        flat = self._flat_cell_ids(self._cell_coords(points))
+        self.order = np.argsort(flat, kind="stable")
+        self.points = points[self.order]
+        n_cells = self.cells_per_axis ** dims
+        self.cell_starts = np.searchsorted(flat[self.order], np.arange(n_cells + 1))
+
+    def _cell_coords(self, points: np.ndarray) -> np.ndarray:
+        coords = np.floor((points - self.lo) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.cells_per_axis - 1)
+
+    def _flat_cell_ids(self, coords: np.ndarray) -> np.ndarray:
+        flat = np.zeros(coords.shape[0], dtype=np.int64)
+        for axis in range(self.dims):
+            flat = flat * self.cells_per_axis + coords[:, axis]
+        return flat
+
+    def box(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Indices (into the original points) of the points inside [lo, hi]."""
+        lo = np.asarray(lo, dtype=np.float32)
+        hi = np.asarray(hi, dtype=np.float32)
+        if self.points.shape[0] == 0 or np.any(hi < self.lo) or np.any(lo > self.hi):
+            return np.empty(0, dtype=np.int64)
+
+        lo_cell = self._cell_coords(np.maximum(lo, self.lo)[None, :])[0]
+        hi_cell = self._cell_coords(np.minimum(hi, self.hi)[None, :])[0]
+        axes = [np.arange(lo_cell[a], hi_cell[a] + 1) for a in range(self.dims)]
+        cells = self._flat_cell_ids(np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, self.dims))
+
+        starts = self.cell_starts[cells]
+        lengths = self.cell_starts[cells + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenate the cell slices without a Python loop.
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        candidates = offsets + np.arange(total)
+
+        inside = np.all((self.points[candidates] >= lo) & (self.points[candidates] <= hi), axis=1)
+        return np.sort(self.order[candidates[inside]])
+
+
+def _grid_sample(points: np.ndarray, cells_per_axis: int) -> np.ndarray:
+    """Row indices keeping the first point of every occupied cell of a uniform grid."""
+    lo = points.min(axis=0)
+    span = points.max(axis=0) - lo
+    cell_size = np.where(span > 0, span / cells_per_axis, 1.0)
+    coords = np.clip(np.floor((points - lo) / cell_size).astype(np.int64), 0, cells_per_axis - 1)
+    flat = np.zeros(points.shape[0], dtype=np.int64)
+    for axis in range(points.shape[1]):
+        flat = flat * cells_per_axis + coords[:, axis]
+    _, first = np.unique(flat, return_index=True)
+    return np.sort(first)
+
+
+def _even_stride(rows: np.ndarray, max_points: int) -> np.ndarray:
+    """At most max_points rows taken at an even stride, so they spread over the whole result."""
+    if rows.size <= max_points:
+        return rows
+    step = int(np.ceil(rows.size / max_points))
+    return rows[::step][:max_points]
+
+
+class UmapIndex:
+    """
+    Spatial index over the UMAP coordinates of one version, with level of
+    detail. Every coarse level keeps one point per occupied cell of a uniform
+    grid (2, 4, 8, ... cells per axis), which gives spatially even
+    subsamples; the last level holds every point.
+    Each level has its own GridIndex.
+    """
+
+    def __init__(self, n_paragraphs: np.ndarray, umap: np.ndarray):
+        self.n_paragraphs = np.asarray(n_paragraphs)
+        self.umap = np.asarray(umap, dtype=np.float32)
+        n, dims = self.umap.shape
+
+        # Each level is an array of row indices into self.umap, coarse to fine.
+        self.levels: List[np.ndarray] = []
+        if n:
+            cells_per_axis = 2
+            while cells_per_axis <= MAX_LOD_CELLS_PER_AXIS:
+                sample = _grid_sample(self.umap, cells_per_axis)
+                if sample.size * 2 > n:
+                    # Close enough to the full set, which is always the last level.
+                    break
+                if not self.levels or sample.size > self.levels[-1].size:
+                    self.levels.append(sample)
+                cells_per_axis *= 2
+        self.levels.append(np.arange(n))
+        self.level_indexes = [GridIndex(self.umap[rows]) for rows in self.levels]
+
+    @property
+    def n_levels(self) -> int:
+        return len(self.levels)
+
+    def _query_level(self, level: int, lo: np.ndarray, hi: np.ndarray,
+                     center: Optional[np.ndarray], radius: Optional[float]) -> np.ndarray:
+        rows = self.levels[level]
+        local = self.level_indexes[level].box(lo, hi)
+        result = rows[local]
+        if center is not None:
+            distances = np.linalg.norm(self.umap[result] - center, axis=1)
+            result = result[distances <= radius]
+        return result
+
+    def query(self,
+              lo: Optional[np.ndarray] = None,
+              hi: Optional[np.ndarray] = None,
+              center: Optional[np.ndarray] = None,
+              radius: Optional[float] = None,
+              max_points: int = 5000,
+              level: Optional[int] = None) -> Tuple[int, np.ndarray]:
+        """
+        Returns the points inside a box, or within a radius of a center, at the
+        finest level of detail that fits in max_points (or at a fixed level).
+        Levels are tried coarse to fine and the search stops at the first one
+        that overflows, but that level is still scanned in full. A level can
+        hold up to 2^dims times the points of the previous one (8x in 3-d)
+        and the last level holds every point, so the work is not bounded by
+        the size of the returned payload: it is the points in the query
+        region on every level tried.
+
+        Returns:
+            Tuple[int, np.ndarray]: The level used and the row indices of the
+                                    matching points, in paragraph order.
+        """
+        if center is not None:
+            center = np.asarray(center, dtype=np.float32)
+            lo, hi = center - radius, center + radius
+        if lo is None:
+            lo = np.full(self.umap.shape[1], -np.inf, dtype=np.float32)
+        if hi is None:
+            hi = np.full(self.umap.shape[1], np.inf, dtype=np.float32)
+
+        if level is not None:
+            level = int(np.clip(level, 0, self.n_levels - 1))
+            return level, _even_stride(self._query_level(level, lo, hi, center, radius), max_points)
+
+        chosen_level, chosen = 0, None
+        for current in range(self.n_levels):
+            result = self._query_level(current, lo, hi, center, radius)
+            if result.size > max_points:
+                break
+            chosen_level, chosen = current, result
+        if chosen is None:
+            # Even the coarsest level overflows
+            chosen = _even_stride(result, max_points)
+        return chosen_level, chosen
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "total_points": int(self.umap.shape[0]),
+            "level_sizes": [int(rows.size) for rows in self.levels],
+            "bounds": [self.umap.min(axis=0).tolist(), self.umap.max(axis=0).tolist()] if self.umap.size else None,
+        }
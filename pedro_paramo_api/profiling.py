@@ -0,0 +1,231 @@
+# pedro_paramo_api/profiling.py
+
+import os
+import sys
+import time
+import json
+import hmac
+import random
+import asyncio
+import functools
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+
+# Profiling is opt-in: it only exists when PROFILING_TOKEN is set. Without it
+# @profiled returns functions untouched and the middleware isn't installed,
+# so a normal deployment pays nothing.
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILING_ENABLED = bool(PROFILING_TOKEN)
+# Fraction of requests profiled in the background (0 disables).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+PROFILING_OUTPUT_DIR = os.getenv("PROFILING_OUTPUT_DIR", "/tmp/pedro_paramo_profiles")
+# Seconds between stack samples.
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", 0.002))
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """Time spent in the @profiled spans (DB I/O, parsing, serialisation) during one request."""
+
+    def __init__(self):
+        self.spans: Dict[str, list] = {}
+
+    def add(self, name: str, seconds: float):
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+    def report(self) -> Dict[str, Any]:
+        return {name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in self.spans.items()}
+
+
+def profiled(name: str):
+    """
+    Decorator recording the time spent in a function under `name` for the
+    request being profiled. Works on sync and async functions. When profiling
+    is disabled it returns the function itself.
+    """
+    def decorate(func):
+        if not PROFILING_ENABLED:
+            return func
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                profile = _current_profile.get()
+                if profile is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profile.add(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread (the event loop's) from a
+    background thread and counts collapsed stacks ("outer;...;inner"), the
+    input format of flamegraph.pl / speedscope. Being a sampling profiler
+    it sees whatever the loop runs, so concurrent requests show up too.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILING_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, n: int = 25):
+        # Self time: the innermost frame of each sample
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": f, "samples": c, "share": round(c / self.samples, 4)} for f, c in leaves.most_common(n)]
+
+
+def _write_profile(path_prefix: str, sampler: StackSampler, report: Dict[str, Any]):
+    os.makedirs(PROFILING_OUTPUT_DIR, exist_ok=True)
+    with open(f"{path_prefix}.folded", "w") as f:
+        f.write(sampler.collapsed())
+    with open(f"{path_prefix}.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+
+_PROFILE_ON = {"1", "true", "yes", "on"}
+
+
+def profile_mode(query_string: bytes) -> Optional[str]:
+    """
+    What ?profile= asks for: "collapsed", "json" for a true value (1, true,
+    yes, on) or None for anything else, including profile=0 and profile=false.
+    """
+    value = parse_qs(query_string.decode()).get("profile", [""])[0].strip().lower()
+    if value == "collapsed":
+        return "collapsed"
+    return "json" if value in _PROFILE_ON else None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests on demand, only installed when PROFILING_ENABLED.
+
+    - `?profile=1` with a matching `X-Profile-Token` header replaces the
+      response by a JSON report (spans, self-time per function, collapsed
+      stacks); `?profile=collapsed` returns the collapsed stacks as text.
+    - PROFILING_SAMPLE_RATE of the other requests are profiled silently and
+      written to PROFILING_OUTPUT_DIR as <name>.folded and <name>.json.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = profile_mode(scope.get("query_string", b""))
+        if mode:
+            token = Headers(scope=scope).get("x-profile-token", "")
+            if not hmac.compare_digest(token.encode(), PROFILING_TOKEN.encode()):
+                await self._send_bytes(send, 403, b'{"detail":"Invalid or missing X-Profile-Token."}', "application/json")
+                return
+        elif not (PROFILING_SAMPLE_RATE and random.random() < PROFILING_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        sampler = StackSampler(threading.get_ident())
+        status = {"code": None}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            if not mode:
+                await send(message)
+
+        token = _current_profile.set(profile)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            wall = time.perf_counter() - start
+            sampler.stop()
+            _current_profile.reset(token)
+
+        report = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status_code": status["code"],
+            "wall_seconds": round(wall, 6),
+            "spans": profile.report(),
+            "samples": sampler.samples,
+            "sampling_interval": sampler.interval,
+            "top_functions": sampler.top_functions(),
+        }
+
+        if mode == "collapsed":
+            await self._send_bytes(send, 200, sampler.collapsed().encode(), "text/plain; charset=utf-8")
+        elif mode:
+            report["collapsed"] = sampler.collapsed()
+            await self._send_bytes(send, 200, json.dumps(report).encode(), "application/json")
+        else:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}{scope['path'].replace('/', '_')}-{random.getrandbits(32):08x}"
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, _write_profile, os.path.join(PROFILING_OUTPUT_DIR, name), sampler, report)
+
+    @staticmethod
+    async def _send_bytes(send, status_code: int, body: bytes, content_type: str):
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,92 @@
+# pedro_paramo_api.routers.admission.py
+
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, HTTPException
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded wait queue for one class of endpoints.
+    Up to max_concurrent requests run at once and up to max_queue wait for a
+    slot; anything beyond that is rejected straight away with a 503 and a
+    Retry-After header instead of piling up on the DB pool.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, retry_after: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Too many '{self.name}' requests, try again later.",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+
+def _limiter_from_env(name: str, max_concurrent: int, max_queue: int, retry_after: int) -> AdmissionLimiter:
+    prefix = f"ADMISSION_{name.upper()}_"
+    return AdmissionLimiter(
+        name,
+        int(os.getenv(prefix + "CONCURRENCY", max_concurrent)),
+        int(os.getenv(prefix + "QUEUE", max_queue)),
+        int(os.getenv(prefix + "RETRY_AFTER", retry_after)),
+    )
+
+
+# "cheap": answered from memory (attributes, indexes, single paragraphs).
+# "heavy": full-version payloads and vector work that can hold a DB
+# connection or a CPU for a long time.
+LIMITERS = {
+    "cheap": _limiter_from_env("cheap", max_concurrent=64, max_queue=256, retry_after=1),
+    "heavy": _limiter_from_env("heavy", max_concurrent=4, max_queue=16, retry_after=5),
+}
+
+
+def get_limiter(endpoint_class: str) -> AdmissionLimiter:
+    return LIMITERS[endpoint_class]
+
+
+def admit(endpoint_class: str):
+    """Route dependency holding a slot of the given endpoint class for the request."""
+    limiter = get_limiter(endpoint_class)
+
+    async def dependency():
+        async with limiter.slot():
+            yield
+
+    return Depends(dependency)
@@ -0,0 +1,137 @@
+# pedro_paramo_api.routers.batch.py
+
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+from typing import Dict, Any, List
+
+from ..database.engine import AsyncDBSession
+from ..database.ask_db import paragraph_not_found
+from .corpus import (
+    ALLOWED_ATTRIBUTES,
+    ALLOWED_ASYNC_METHODS_WITH_SESSION,
+    ALLOWED_ASYNC_METHODS_WITH_SESSION_AND_INT_ARG
+)
+from .responses import FastJSONResponse
+from .admission import admit
+
+router = APIRouter()
+
+MAX_BATCH_ITEMS = 100
+# Items of one batch hitting the DB at the same time, each with its own session.
+MAX_CONCURRENT_ITEMS = 8
+# These are all built from word_freq, which a batch computes once per version.
+WORD_FREQ_METHODS = {"word_freq", "int_to_word", "word_to_int"}
+
+
+class BatchItem(BaseModel):
+    version: str
+    name: str
+    args: Dict[str, Any] = {}
+
+
+class _BatchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _Batch:
+    """
+    Resolves the items of one batch request. Every distinct piece of work
+    (an item, or the word_freq a version's items share) runs once as a task
+    and items asking for the same thing await the same task.
+    """
+
+    def __init__(self, corpus_cache: Dict[str, Any]):
+        self.corpus_cache = corpus_cache
+        self.tasks: Dict[Any, asyncio.Future] = {}
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_ITEMS)
+
+    def _shared(self, key, make_coroutine):
+        task = self.tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_coroutine())
+            self.tasks[key] = task
+        return task
+
+    async def _call(self, method, *args):
+        # AsyncSession isn't safe for concurrent use, so each call gets its own.
+        async with self.semaphore:
+            async with AsyncDBSession() as session:
+                return await method(session, *args)
+
+    async def _word_freq_method(self, version: str, corpus, name: str):
+        # Keyed apart from the items, so a word_freq item doesn't await itself
+        word_freq = await self._shared((version, "word_freq:shared"), lambda: self._call(corpus.word_freq))
+        if isinstance(word_freq, str) or name == "word_freq":
+            return word_freq
+        return await getattr(corpus, name)(None, word_freq)
+
+    async def _method(self, key, make_coroutine):
+        result = await self._shared(key, make_coroutine)
+        # Methods report errors as strings. n_paragraph returns its text as a
+        # string, so only its own not-found message is an error.
+        name = key[1]
+        if name == "n_paragraph":
+            if result == paragraph_not_found(key[2]):
+                raise _BatchError(404, result)
+        elif isinstance(result, str):
+            raise _BatchError(404, result)
+        return result
+
+    async def resolve(self, item: BatchItem):
+        corpus = self.corpus_cache.get(item.version)
+        if not corpus:
+            raise _BatchError(404, f"Version '{item.version}' not found or not loaded.")
+
+        name = item.name
+        if name in ALLOWED_ATTRIBUTES:
+            return getattr(corpus, name)
+
+        if name in ALLOWED_ASYNC_METHODS_WITH_SESSION:
+            if name in WORD_FREQ_METHODS:
+                return await self._method((item.version, name, None),
+                                          lambda: self._word_freq_method(item.version, corpus, name))
+            return await self._method((item.version, name, None), lambda: self._call(getattr(corpus, name)))
+
+        if name in ALLOWED_ASYNC_METHODS_WITH_SESSION_AND_INT_ARG:
+            try:
+                n_paragraph = int(item.args["n_paragraph"])
+            except (KeyError, TypeError, ValueError):
+                raise _BatchError(400, f"Method '{name}' requires an integer 'n_paragraph' in args.")
+            return await self._method((item.version, name, n_paragraph),
+                                      lambda: self._call(getattr(corpus, name), n_paragraph))
+
+        raise _BatchError(404, f"Attribute or method '{name}' is not allowed or does not exist for version '{item.version}'.")
+
+    async def run_item(self, item: BatchItem) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"version": item.version, "name": item.name}
+        if item.args:
+            entry["args"] = item.args
+        try:
+            entry["result"] = await self.resolve(item)
+        except _BatchError as e:
+            entry["error"] = {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            entry["error"] = {"status_code": 500, "detail": f"Error calling '{item.name}' for version '{item.version}': {e}"}
+        return entry
+
+
+@router.post("/batch", dependencies=[admit("heavy")])
+async def api_batch(items: List[BatchItem], request: Request):
+    """
+    Resolves many corpus attributes / methods in one round trip. Items run in
+    parallel, identical items and the word_freq behind word_freq / int_to_word
+    / word_to_int of the same version are computed once. Results come back in
+    the order of the items; a failing item carries an 'error' instead of a
+    'result' and doesn't fail the others.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="The batch is empty.")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can have at most {MAX_BATCH_ITEMS} items.")
+
+    batch = _Batch(request.app.state.corpus_cache)
+    results = await asyncio.gather(*(batch.run_item(item) for item in items))
+    return FastJSONResponse({"results": results})
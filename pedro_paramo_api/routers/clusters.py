@@ -0,0 +1,81 @@
+# pedro_paramo_api.routers.clusters.py
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ..database.engine import get_lazy_db_session
+from .admission import admit
+from ..operations.clustering import cluster_paragraphs, remember
+from .responses import FastJSONResponse
+
+# These routes share the two-segment shape of /{version}/{attribute_or_method_name},
+# so this router has to be included before the corpus router.
+router = APIRouter()
+
+MAX_CLUSTERS = 256
+
+
+def _check_k(k: int):
+    if not 1 <= k <= MAX_CLUSTERS:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_CLUSTERS}.")
+
+
+@router.get("/clusters", dependencies=[admit("heavy")])
+async def api_get_cross_version_clusters(
+    request: Request,
+    k: int = 20,
+    seed: int = 0,
+    versions: Optional[str] = None,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Clusters the paragraphs of several versions together (all loaded versions
+    by default, or a comma separated list in ?versions=).
+    """
+    _check_k(k)
+    corpus_cache = request.app.state.corpus_cache
+    version_names = sorted(corpus_cache) if not versions else [v.strip() for v in versions.split(',') if v.strip()]
+    missing = [v for v in version_names if v not in corpus_cache]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Versions {missing} not found or not loaded.")
+    if not version_names:
+        raise HTTPException(status_code=404, detail="No versions loaded.")
+
+    key = (tuple(version_names), k, seed)
+    cache = request.app.state.cluster_cache
+    if key in cache:
+        return FastJSONResponse(cache[key])
+
+    inputs = []
+    for version_name in version_names:
+        vectors = await corpus_cache[version_name].paragraph_vectors(db_session)
+        if isinstance(vectors, str):
+            raise HTTPException(status_code=404, detail=vectors)
+        numbers, embeddings, umap = vectors
+        inputs.append((version_name, numbers, embeddings, umap))
+
+    result = await cluster_paragraphs(inputs, k, seed)
+    return FastJSONResponse(remember(cache, key, {"versions": version_names, **result}))
+
+
+@router.get("/{version}/clusters", dependencies=[admit("heavy")])
+async def api_get_version_clusters(
+    version: str,
+    request: Request,
+    k: int = 20,
+    seed: int = 0,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Clusters the paragraphs of one version with mini-batch k-means.
+    """
+    _check_k(k)
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+
+    result = await corpus_instance.clusters(db_session, k, seed)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, **result})
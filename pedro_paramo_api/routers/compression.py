@@ -0,0 +1,222 @@
+# pedro_paramo_api.routers.compression.py
+
+import os
+import gzip
+import zlib
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..database.engine import AsyncDBSession
+from .responses import dumps
+from ..profiling import profiled
+
+# brotli and zstandard are optional: an encoding whose module isn't installed
+# is simply never offered.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client accepts several encodings with the same q.
+ENCODINGS: List[str] = [name for name, module in (("zstd", zstandard), ("br", brotli), ("gzip", gzip)) if module]
+
+# Large text payloads that never change for a given Corpus instance. Their
+# JSON body and its compressed variants are built once, in the background.
+# all_embeddings / all_umap are left out on purpose: their JSON plus three
+# compressed copies would weigh several times the float32 matrices (and undo
+# quantization and the mmapped snapshot), so they are compressed on the fly
+# by CompressionMiddleware instead.
+PRECOMPRESSED_PAYLOADS = ["text", "word_set", "all_paragraphs", "word_freq"]
+
+# Dynamic responses smaller than this go out uncompressed.
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """
+    Picks the encoding to use from an Accept-Encoding header: highest q value
+    first, then the server preference order of ENCODINGS. Returns None for
+    identity.
+    """
+    available = list(ENCODINGS if available is None else available)
+    if not accept_encoding or not available:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        coding = pieces[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for parameter in pieces[1:]:
+            key, _, value = parameter.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available:
+        q = qualities.get(coding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+@profiled("compression")
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """One-shot compression. Static payloads are built once, so they get the highest levels."""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 5)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=19 if static else 3).compress(data)
+    raise ValueError(f"Unsupported encoding '{encoding}'.")
+
+
+class _StreamCompressor:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._process, self._finish = self._compressor.compress, self._compressor.flush
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=5)
+            self._process, self._finish = self._compressor.process, self._compressor.finish
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+            self._process, self._finish = self._compressor.compress, self._compressor.flush
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}'.")
+
+    # Dynamic responses are compressed here, in the request, so this is the
+    # compression time a request profile has to show.
+    @profiled("compression")
+    def process(self, data: bytes) -> bytes:
+        return self._process(data)
+
+    @profiled("compression")
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def build_variants(body: bytes) -> Dict[str, bytes]:
+    variants = {"identity": body}
+    for encoding in ENCODINGS:
+        variants[encoding] = compress(body, encoding, static=True)
+    return variants
+
+
+def precompressed_response(variants: Dict[str, bytes], accept_encoding: Optional[str]) -> Response:
+    encoding = negotiate(accept_encoding, [e for e in ENCODINGS if e in variants])
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding or "identity"], media_type="application/json", headers=headers)
+
+
+async def precompress_corpora(corpora: Iterable) -> None:
+    """
+    Renders the PRECOMPRESSED_PAYLOADS of every Corpus exactly as
+    /{version}/{name} would and stores their compressed variants on the
+    instance. Compression runs in the default executor, one payload at a
+    time, so serving traffic keeps most of the CPU.
+    """
+    if os.getenv("PRECOMPRESS_RESPONSES", "1") == "0":
+        return
+    loop = asyncio.get_running_loop()
+    for corpus_instance in corpora:
+        for name in PRECOMPRESSED_PAYLOADS:
+            if name in corpus_instance.precompressed:
+                continue
+            try:
+                value = getattr(corpus_instance, name)
+                if callable(value):
+                    async with AsyncDBSession() as session:
+                        value = await value(session)
+                    if isinstance(value, str):
+                        # Methods report errors as strings, don't freeze those
+                        continue
+                body = dumps({"version": corpus_instance.version, name: value})
+                corpus_instance.precompressed[name] = await loop.run_in_executor(None, build_variants, body)
+            except Exception as e:
+                print(f"  - Failed to precompress '{name}' for version {corpus_instance.version}: {e}")
+        print(f"  - Precompressed payloads ready for version: {corpus_instance.version}")
+
+
+class CompressionMiddleware:
+    """
+    Compresses dynamic responses with the best encoding the client accepts.
+    A single-chunk body under minimum_size is sent as is; anything larger (or
+    streamed) is compressed chunk by chunk. Responses that already carry a
+    Content-Encoding (e.g. precompressed payloads) are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                passthrough = "content-encoding" in Headers(raw=message["headers"])
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = compressor.process(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start_message)
+
+            chunk = compressor.process(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,73 @@
+# pedro_paramo_api.routers.concordance.py
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.engine import get_lazy_db_session
+from .admission import admit
+from .responses import FastJSONResponse
+from .validation import check_word
+
+# /{version}/concordance shares the shape of /{version}/{attribute_or_method_name},
+# so this router has to be included before the corpus router.
+router = APIRouter()
+
+MAX_WINDOW = 50
+MAX_LIMIT = 10000
+
+
+def _check_params(word: str, window: int, limit: int, offset: int):
+    check_word(word)
+    if not 0 <= window <= MAX_WINDOW:
+        raise HTTPException(status_code=400, detail=f"window must be between 0 and {MAX_WINDOW}.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_LIMIT}.")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset can't be negative.")
+
+
+# Can build the concordance index of every loaded version
+@router.get("/concordance", dependencies=[admit("heavy")])
+async def api_get_cross_version_concordance(
+    word: str,
+    request: Request,
+    window: int = 8,
+    limit: int = 1000,
+    offset: int = 0,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Keyword in context for a word in every loaded version.
+    """
+    _check_params(word, window, limit, offset)
+    results = {}
+    for version, corpus_instance in request.app.state.corpus_cache.items():
+        result = await corpus_instance.concordance(db_session, word, window, limit, offset)
+        if isinstance(result, str):
+            continue
+        results[version] = result
+    return FastJSONResponse({"word": word, "versions": results})
+
+
+@router.get("/{version}/concordance", dependencies=[admit("cheap")])
+async def api_get_version_concordance(
+    version: str,
+    word: str,
+    request: Request,
+    window: int = 8,
+    limit: int = 1000,
+    offset: int = 0,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Keyword in context for every occurrence of a word in one version.
+    """
+    _check_params(word, window, limit, offset)
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+
+    result = await corpus_instance.concordance(db_session, word, window, limit, offset)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, **result})
@@ -1,22 +1,62 @@
 # pedro_paramo_api.routers.corpus.py
 
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import numpy as np
 
-from ..database.engine import get_db_session
+from ..database.engine import get_lazy_db_session
+from .admission import admit, get_limiter
 from ..operations.corpus import Corpus
+from .responses import FastJSONResponse
+from .compression import precompressed_response
 
 
 router = APIRouter()
 
-@router.get("/{version}/{attribute_or_method_name}")
+# What /{version}/{attribute_or_method_name} (and each item of POST /batch)
+# is allowed to reach on a Corpus instance.
+ALLOWED_ATTRIBUTES = [
+    "author", "year", "editorial", "ISBN", "metadata", "text",
+    "n_words", "n_paragraphs", "word_set"
+]
+
+ALLOWED_ASYNC_METHODS_WITH_SESSION = [
+    "word_freq", "int_to_word", "word_to_int", "all_paragraphs",
+    "all_embeddings", "all_umap", "quantization_report"
+]
+
+ALLOWED_ASYNC_METHODS_WITH_SESSION_AND_INT_ARG = [
+    "n_paragraph", "n_paragraph_embedding", "n_paragraph_umap"
+]
+
+# Methods returning whole-version vector payloads or doing vector work.
+HEAVY_METHODS = {"all_embeddings", "all_umap", "quantization_report"}
+
+def endpoint_class(corpus_instance, attribute_or_method_name: str) -> str:
+    """
+    Admission class of /{version}/{attribute_or_method_name} for one Corpus.
+    Attributes are cheap. The other methods are only answered from memory
+    once the instance has its arrays loaded or a precompressed variant is
+    ready; until then they read and parse the version from the database.
+    """
+    if attribute_or_method_name in HEAVY_METHODS:
+        return "heavy"
+    if attribute_or_method_name not in ALLOWED_ASYNC_METHODS_WITH_SESSION or corpus_instance is None:
+        return "cheap"
+    if corpus_instance.arrays_loaded or attribute_or_method_name in corpus_instance.precompressed:
+        return "cheap"
+    return "heavy"
+
+async def corpus_admission(version: str, attribute_or_method_name: str, request: Request):
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    async with get_limiter(endpoint_class(corpus_instance, attribute_or_method_name)).slot():
+        yield
+
+@router.get("/{version}/{attribute_or_method_name}", dependencies=[Depends(corpus_admission)])
 async def api_get_corpus_data(
     version: str,
     attribute_or_method_name: str,
     request: Request,
-    db_session: AsyncSession = Depends(get_db_session)
+    db_session: AsyncSession = Depends(get_lazy_db_session)
 ):
     """
     Dynamically retrieves a specified attribute or calls a method from a pre-loaded Corpus instance.
@@ -25,48 +65,56 @@ async def api_get_corpus_data(
     if not corpus_instance:
         raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
 
-    allowed_attributes = [
-        "author", "year", "editorial", "ISBN", "metadata", "text",
-        "n_words", "n_paragraphs", "word_set"
-    ]
-
-    allowed_async_methods_with_session = [
-        "word_freq", "int_to_word", "word_to_int", "all_paragraphs",
-        "all_embeddings", "all_umap"
-    ]
-
-    allowed_async_methods_with_session_and_int_arg = [
-        "n_paragraph", "n_paragraph_embedding", "n_paragraph_umap"
-    ]
+    # Large static payloads are served from their prebuilt variants once ready
+    variants = corpus_instance.precompressed.get(attribute_or_method_name)
+    if variants and (attribute_or_method_name in ALLOWED_ATTRIBUTES
+                     or attribute_or_method_name in ALLOWED_ASYNC_METHODS_WITH_SESSION):
+        return precompressed_response(variants, request.headers.get("accept-encoding"))
 
-    if attribute_or_method_name in allowed_attributes:
+    if attribute_or_method_name in ALLOWED_ATTRIBUTES:
         try:
             value = getattr(corpus_instance, attribute_or_method_name)
-            if isinstance(value, set):
-                value = list(value)
-            return {"version": version, attribute_or_method_name: value}
+            return FastJSONResponse({"version": version, attribute_or_method_name: value})
         except AttributeError:
             raise HTTPException(status_code=404, detail=f"Attribute '{attribute_or_method_name}' not found for version '{version}'.")
 
-    elif attribute_or_method_name in allowed_async_methods_with_session:
+    elif attribute_or_method_name in ALLOWED_ASYNC_METHODS_WITH_SESSION:
         try:
             method = getattr(corpus_instance, attribute_or_method_name)
-            result = await method(db_session) 
+            result = await method(db_session)
 
-            if isinstance(result, np.ndarray):
-                result = result.tolist() 
-            elif isinstance(result, set):
-                result = list(result)
-
-            return {"version": version, attribute_or_method_name: result}
+            # NumPy arrays and sets are serialized by FastJSONResponse directly.
+            return FastJSONResponse({"version": version, attribute_or_method_name: result})
         except AttributeError:
             raise HTTPException(status_code=404, detail=f"Method '{attribute_or_method_name}' not found for version '{version}'.")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error calling method '{attribute_or_method_name}' for version '{version}': {e}")
 
-    elif attribute_or_method_name in allowed_async_methods_with_session_and_int_arg:
+    elif attribute_or_method_name in ALLOWED_ASYNC_METHODS_WITH_SESSION_AND_INT_ARG:
         raise HTTPException(status_code=400, detail=f"Method '{attribute_or_method_name}' requires additional arguments (e.g., paragraph number). Please use a specific endpoint for this.")
 
     else:
         raise HTTPException(status_code=404, detail=f"Attribute or method '{attribute_or_method_name}' is not allowed or does not exist for version '{version}'.")
 
+
+@router.get("/{version}/paragraph/{n_paragraph}/similar", dependencies=[admit("heavy")])
+async def api_get_similar_paragraphs(
+    version: str,
+    n_paragraph: int,
+    request: Request,
+    k: int = 10,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Returns the k paragraphs of a version most similar to the given one.
+    """
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+    if k < 1:
+        raise HTTPException(status_code=400, detail="k must be a positive integer.")
+
+    result = await corpus_instance.similar_paragraphs(db_session, n_paragraph, k)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, "n_paragraph": n_paragraph, "similar": result})
@@ -0,0 +1,109 @@
+# pedro_paramo_api.routers.projection.py
+
+import re
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
+import numpy as np
+
+from ..database.engine import get_lazy_db_session
+from .admission import admit
+from ..operations.clustering import remember
+from ..operations.projection import project_paragraphs, subset_hash
+from .responses import FastJSONResponse
+
+router = APIRouter()
+
+
+# A number or an inclusive range of numbers, any of them negative: 5, -5, 1-50, -5-3
+_RANGE = re.compile(r"^(-?\d+)(?:\s*-\s*(-?\d+))?$")
+
+
+def _parse_paragraphs(value: str) -> Tuple[Tuple[int, int], ...]:
+    """
+    '70-80,1-50,60,45-55' -> ((1, 55), (60, 60), (70, 80)). Ranges are
+    inclusive, and come back sorted with the overlapping or adjacent ones
+    merged, so equivalent filters give the same cache key.
+    """
+    ranges = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if not match:
+            raise HTTPException(status_code=400, detail="'paragraphs' must be comma separated numbers or ranges like 1-50.")
+        low = int(match.group(1))
+        high = int(match.group(2)) if match.group(2) is not None else low
+        if high < low:
+            raise HTTPException(status_code=400, detail=f"Invalid paragraph range '{part}'.")
+        ranges.append((low, high))
+    if not ranges:
+        raise HTTPException(status_code=400, detail="'paragraphs' can't be empty.")
+
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return tuple(merged)
+
+
+def _select(numbers: np.ndarray, ranges: Optional[Tuple[Tuple[int, int], ...]]) -> np.ndarray:
+    if ranges is None:
+        return np.ones(len(numbers), dtype=bool)
+    mask = np.zeros(len(numbers), dtype=bool)
+    for low, high in ranges:
+        mask |= (numbers >= low) & (numbers <= high)
+    return mask
+
+
+@router.get("/project", dependencies=[admit("heavy")])
+async def api_get_projection(
+    request: Request,
+    versions: Optional[str] = None,
+    paragraphs: Optional[str] = None,
+    dims: int = 2,
+    seed: int = 0,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Projects the embeddings of a subset of paragraphs into one shared 2-d or
+    3-d space with randomized PCA, so translations can be compared on the
+    same axes. ?versions= is a comma separated list (all loaded versions by
+    default) and ?paragraphs= numbers or ranges like 1-50,60 applied to each
+    of them (all paragraphs by default). Results are cached by versions,
+    normalised ranges, dims and seed, and a cached result is served without
+    touching the vectors.
+    """
+    if dims not in (2, 3):
+        raise HTTPException(status_code=400, detail="dims must be 2 or 3.")
+    corpus_cache = request.app.state.corpus_cache
+    version_names = sorted(corpus_cache) if not versions else [v.strip() for v in versions.split(',') if v.strip()]
+    missing = [v for v in version_names if v not in corpus_cache]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Versions {missing} not found or not loaded.")
+    if not version_names:
+        raise HTTPException(status_code=404, detail="No versions loaded.")
+    ranges = _parse_paragraphs(paragraphs) if paragraphs is not None else None
+
+    key = (tuple(version_names), ranges, dims, seed)
+    cache = request.app.state.projection_cache
+    if key in cache:
+        return FastJSONResponse(cache[key])
+
+    selected = []
+    for version_name in version_names:
+        vectors = await corpus_cache[version_name].paragraph_vectors(db_session)
+        if isinstance(vectors, str):
+            raise HTTPException(status_code=404, detail=vectors)
+        numbers, embeddings, _ = vectors
+        mask = _select(numbers, ranges)
+        selected.append((version_name, numbers[mask], embeddings[mask]))
+    if sum(len(numbers) for _, numbers, _ in selected) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 paragraphs are needed for a projection.")
+
+    subset = subset_hash(version_names, [numbers for _, numbers, _ in selected])
+    result = await project_paragraphs(selected, dims, seed)
+    return FastJSONResponse(remember(cache, key, {"versions": version_names, "subset": subset, **result}))
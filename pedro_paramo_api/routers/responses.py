@@ -0,0 +1,40 @@
+# pedro_paramo_api.routers.responses.py
+
+from typing import Any
+import orjson
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from ..profiling import profiled
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # orjson hands over what it can't serialize natively: numpy arrays that
+    # aren't C-contiguous or have an unsupported dtype, numpy scalars, sets.
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+@profiled("serialization")
+def dumps(content: Any) -> bytes:
+    """Serializes content with orjson, NumPy arrays included."""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Return it directly from a route
+    (instead of a dict) so FastAPI skips jsonable_encoder, and NumPy arrays
+    are written straight from their buffers without .tolist().
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,102 @@
+# pedro_paramo_api.routers.umap.py
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+import numpy as np
+
+from ..database.engine import get_lazy_db_session
+from .admission import admit
+from .responses import FastJSONResponse
+
+# /{version}/umap shares the shape of /{version}/{attribute_or_method_name},
+# so this router has to be included before the corpus router.
+router = APIRouter()
+
+MAX_POINTS_LIMIT = 50000
+
+
+def _parse_floats(value: str, name: str, sizes: List[int]) -> np.ndarray:
+    try:
+        numbers = [float(x) for x in value.split(',')]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a comma separated list of numbers.")
+    if len(numbers) not in sizes:
+        raise HTTPException(status_code=400, detail=f"'{name}' must have {' or '.join(map(str, sizes))} values.")
+    return np.array(numbers, dtype=np.float32)
+
+
+@router.get("/{version}/umap", dependencies=[admit("cheap")])
+async def api_get_umap_viewport(
+    version: str,
+    request: Request,
+    bbox: Optional[str] = None,
+    center: Optional[str] = None,
+    radius: Optional[float] = None,
+    max_points: int = 5000,
+    lod: Optional[int] = None,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Returns the UMAP points of a version inside a viewport.
+
+    bbox is 'x0,y0,x1,y1' (any z) or 'x0,y0,z0,x1,y1,z1'; alternatively
+    center='x,y,z' with a radius. When more than max_points points fall in
+    the viewport a coarser level of detail is returned; lod forces a level.
+    """
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+    if not 1 <= max_points <= MAX_POINTS_LIMIT:
+        raise HTTPException(status_code=400, detail=f"max_points must be between 1 and {MAX_POINTS_LIMIT}.")
+    if bbox and center:
+        raise HTTPException(status_code=400, detail="Use either 'bbox' or 'center' and 'radius', not both.")
+
+    index = await corpus_instance.get_umap_index(db_session)
+    if isinstance(index, str):
+        raise HTTPException(status_code=404, detail=index)
+    dims = index.umap.shape[1]
+
+    lo = hi = center_point = None
+    if bbox:
+        corners = _parse_floats(bbox, 'bbox', [4, 2 * dims])
+        if corners.size == 4 and dims > 2:
+            # 2-d viewport: leave the remaining axes unbounded
+            lo = np.concatenate([corners[:2], np.full(dims - 2, -np.inf, dtype=np.float32)])
+            hi = np.concatenate([corners[2:], np.full(dims - 2, np.inf, dtype=np.float32)])
+        else:
+            lo, hi = corners[:dims], corners[dims:]
+        lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+    elif center:
+        if radius is None or radius < 0:
+            raise HTTPException(status_code=400, detail="'center' requires a non negative 'radius'.")
+        center_point = _parse_floats(center, 'center', [dims])
+
+    level, rows = index.query(lo=lo, hi=hi, center=center_point, radius=radius, max_points=max_points, level=lod)
+    return FastJSONResponse({
+        "version": version,
+        "level": level,
+        "n_levels": index.n_levels,
+        "total_points": int(index.umap.shape[0]),
+        "returned": int(rows.size),
+        "n_paragraph": index.n_paragraphs[rows],
+        "umap": index.umap[rows],
+    })
+
+
+@router.get("/{version}/umap_levels", dependencies=[admit("cheap")])
+async def api_get_umap_levels(
+    version: str,
+    request: Request,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Describes the level-of-detail subsamples available for a version.
+    """
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+    index = await corpus_instance.get_umap_index(db_session)
+    if isinstance(index, str):
+        raise HTTPException(status_code=404, detail=index)
+    return FastJSONResponse({"version": version, **index.describe()})
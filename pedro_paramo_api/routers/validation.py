@@ -0,0 +1,11 @@
+# pedro_paramo_api.routers.validation.py
+
+from fastapi import HTTPException
+
+from ..operations.frequencies import clean_line
+
+
+def check_word(word: str):
+    """Words are looked up after clean_line, which keeps letters and apostrophes only."""
+    if not clean_line(word):
+        raise HTTPException(status_code=400, detail="'word' has no letters to look up.")
@@ -0,0 +1,137 @@
+# pedro_paramo_api.routers.words.py
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ..database.engine import get_lazy_db_session
+from ..operations.fuzzy import MAX_FUZZY_DISTANCE
+from ..operations.dispersion import compare_distributions
+from .admission import admit
+from .responses import FastJSONResponse
+from .validation import check_word
+
+# Word-level lookups: /{version}/word/{word}/... and the cross-version /dispersion
+router = APIRouter()
+
+MAX_LIMIT = 1000
+MAX_BINS = 1000
+
+
+def _get_corpus(request: Request, version: str):
+    corpus_instance = request.app.state.corpus_cache.get(version)
+    if not corpus_instance:
+        raise HTTPException(status_code=404, detail=f"Version '{version}' not found or not loaded.")
+    return corpus_instance
+
+
+@router.get("/{version}/word/{word}/fuzzy", dependencies=[admit("cheap")])
+async def api_get_fuzzy_words(
+    version: str,
+    word: str,
+    request: Request,
+    max_distance: int = 2,
+    accent_insensitive: bool = False,
+    limit: int = 100,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Vocabulary entries of a version within max_distance edits (Levenshtein)
+    of a word, with their frequencies. accent_insensitive compares words
+    with their diacritics stripped, so 'comala' also finds 'cómala'.
+    """
+    if not 0 <= max_distance <= MAX_FUZZY_DISTANCE:
+        raise HTTPException(status_code=400, detail=f"max_distance must be between 0 and {MAX_FUZZY_DISTANCE}.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_LIMIT}.")
+    check_word(word)
+    corpus_instance = _get_corpus(request, version)
+
+    result = await corpus_instance.fuzzy_words(db_session, word, max_distance, accent_insensitive, limit)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, **result})
+
+
+@router.get("/{version}/word/{word}/timeline", dependencies=[admit("cheap")])
+async def api_get_word_timeline(
+    version: str,
+    word: str,
+    request: Request,
+    bins: int = 50,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    How often a word occurs across the course of a version: counts in `bins`
+    spans of equal length in tokens, with the paragraph each span starts at.
+    """
+    if not 1 <= bins <= MAX_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 1 and {MAX_BINS}.")
+    check_word(word)
+    corpus_instance = _get_corpus(request, version)
+
+    result = await corpus_instance.word_timeline(db_session, word, bins)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, **result})
+
+
+@router.get("/{version}/word/{word}/dispersion", dependencies=[admit("cheap")])
+async def api_get_word_dispersion(
+    version: str,
+    word: str,
+    request: Request,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Juilland's D and Gries' DP of a word over the paragraphs of a version.
+    """
+    check_word(word)
+    corpus_instance = _get_corpus(request, version)
+
+    result = await corpus_instance.word_dispersion(db_session, word)
+    if isinstance(result, str):
+        raise HTTPException(status_code=404, detail=result)
+    return FastJSONResponse({"version": version, **result})
+
+
+# Can build the concordance index of every loaded version
+@router.get("/dispersion", dependencies=[admit("heavy")])
+async def api_get_cross_version_dispersion(
+    request: Request,
+    terms: Optional[str] = None,
+    word: Optional[str] = None,
+    versions: Optional[str] = None,
+    db_session: AsyncSession = Depends(get_lazy_db_session)
+):
+    """
+    Compares the distribution of a word's translations over the aligned
+    paragraphs of several versions. ?terms= lists 'version:word' pairs, e.g.
+    terms=spanish:murmullos,english:murmuring; alternatively ?word= looks up
+    the same word (e.g. a name) in ?versions= (all loaded versions by default).
+    """
+    corpus_cache = request.app.state.corpus_cache
+    if terms:
+        pairs = []
+        for term in terms.split(','):
+            version, _, term_word = term.strip().partition(':')
+            if not version or not term_word:
+                raise HTTPException(status_code=400, detail=f"Invalid term '{term}', expected 'version:word'.")
+            pairs.append((version, term_word))
+    elif word:
+        version_names = sorted(corpus_cache) if not versions else [v.strip() for v in versions.split(',') if v.strip()]
+        pairs = [(version, word) for version in version_names]
+    else:
+        raise HTTPException(status_code=400, detail="Either 'terms' or 'word' is required.")
+    if len(pairs) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 terms are needed for a comparison.")
+
+    indexed_terms = []
+    for version, term_word in pairs:
+        check_word(term_word)
+        index = await _get_corpus(request, version).get_concordance_index(db_session)
+        if isinstance(index, str):
+            raise HTTPException(status_code=404, detail=index)
+        indexed_terms.append((version, index, term_word))
+
+    return FastJSONResponse(compare_distributions(indexed_terms))
@@ -0,0 +1,98 @@
+# tests/conftest.py
+
+import os
+import asyncio
+import sqlite3
+from collections import Counter
+
+import pytest
+
+# The modules under test import database/engine.py, which requires
+# DATABASE_URL unless another storage backend is configured. No test opens
+# a Postgres connection.
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+
+from pedro_paramo_api.database import storage  # noqa: E402
+from pedro_paramo_api.database.storage import (  # noqa: E402
+    PARAGRAPH_COLUMNS,
+    SQLITE_FORMAT_VERSION,
+    SQLITE_SCHEMA,
+    VERSION_COLUMNS,
+    SQLiteBackend,
+    vector_to_blob,
+)
+
+VERSIONS = [
+    {"id": 1, "version_name": "spanish", "author": "Juan Rulfo", "year": 1955, "editorial": "FCE",
+     "ISBN": 9789681601234, "version_data": "{}", "raw_text": "Vine#a Comala a buscar", "n_words": 5,
+     "n_paragraphs": 2, "word_set": "vine#a#comala#buscar", "raw_words": "vine#a#comala#a#buscar"},
+    {"id": 2, "version_name": "english", "author": "Juan Rulfo", "year": 1994, "editorial": "Grove",
+     "ISBN": None, "version_data": "{}", "raw_text": "I came to Comala", "n_words": 4,
+     "n_paragraphs": 1, "word_set": "i#came#to#comala", "raw_words": "i#came#to#comala"},
+]
+
+# Decimals as pgvector prints them: the shortest text of each float32
+PARAGRAPHS = [
+    {"id": 1, "version_name": "spanish", "n_paragraph": 2, "text": "a Comala a buscar", "n_words": 4,
+     "embedding": [0.1, -0.25, 0.33333334], "umap": [1.5, 2.0, -3.1]},
+    {"id": 2, "version_name": "spanish", "n_paragraph": 1, "text": "Vine", "n_words": 1,
+     "embedding": [0.7, 0.12345679, 1e-07], "umap": [0.0, 0.2, 0.4]},
+    {"id": 3, "version_name": "english", "n_paragraph": 1, "text": "I came to Comala", "n_words": 4,
+     "embedding": [0.9, 0.8, 0.6], "umap": [1.0, 1.0, 1.0]},
+]
+
+
+class CountingSQLiteBackend(SQLiteBackend):
+    """Counts the reads of each table, to check how often the storage is hit."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.reads = Counter()
+
+    async def version_columns(self, session, version, columns=None):
+        self.reads[("version", version)] += 1
+        return await super().version_columns(session, version, columns)
+
+    async def paragraph_columns(self, session, version, columns, n_paragraphs=None):
+        self.reads[("paragraph", version)] += 1
+        return await super().paragraph_columns(session, version, columns, n_paragraphs)
+
+
+@pytest.fixture
+def corpus_rows():
+    return VERSIONS, PARAGRAPHS
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    # Same statements and encoding as export_sqlite, without a Postgres to copy from
+    path = str(tmp_path / "corpus.sqlite")
+    connection = sqlite3.connect(path)
+    for statement in SQLITE_SCHEMA:
+        connection.execute(statement)
+    for table, columns, rows in (("version", VERSION_COLUMNS, VERSIONS), ("paragraph", PARAGRAPH_COLUMNS, PARAGRAPHS)):
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        connection.executemany(
+            f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' * len(columns))})",
+            [[vector_to_blob(row[c]) if c in ("embedding", "umap") else row[c] for c in columns] for row in rows])
+    connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                           [("format_version", SQLITE_FORMAT_VERSION), ("content_hash", "abc123")])
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def backend(sqlite_path):
+    backend = SQLiteBackend(sqlite_path)
+    asyncio.run(backend.init())
+    return backend
+
+
+@pytest.fixture
+def counting_backend(sqlite_path, monkeypatch):
+    """A CountingSQLiteBackend installed as the backend get_backend() returns."""
+    backend = CountingSQLiteBackend(sqlite_path)
+    asyncio.run(backend.init())
+    monkeypatch.setattr(storage, "_backend", backend)
+    return backend
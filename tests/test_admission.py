@@ -0,0 +1,117 @@
+# tests/test_admission.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from pedro_paramo_api.routers.admission import AdmissionLimiter, get_limiter
+from pedro_paramo_api.routers.corpus import corpus_admission, endpoint_class
+
+
+def test_slot_caps_concurrency():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=2, max_queue=10, retry_after=1)
+        running = 0
+        peak = 0
+
+        async def request():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(request() for _ in range(8)))
+        return peak, limiter.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert stats["active"] == 0 and stats["waiting"] == 0 and stats["rejected"] == 0
+
+
+def test_queue_overflow_is_rejected_with_retry_after():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, retry_after=7)
+        release = asyncio.Event()
+
+        async def request():
+            async with limiter.slot():
+                await release.wait()
+
+        running = asyncio.create_task(request())
+        queued = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        assert limiter.active == 1 and limiter.waiting == 1
+
+        with pytest.raises(HTTPException) as rejected:
+            async with limiter.slot():
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+        return rejected.value, limiter.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "7"}
+    assert stats["rejected"] == 1 and stats["active"] == 0 and stats["waiting"] == 0
+
+
+def test_slot_is_released_on_exceptions():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=0, retry_after=1)
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                async with limiter.slot():
+                    raise ValueError("handler failed")
+        # Would be rejected straight away if the slot had leaked
+        async with limiter.slot():
+            pass
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["rejected"] == 0
+
+
+def corpus(arrays_loaded=False, precompressed=()):
+    return SimpleNamespace(arrays_loaded=arrays_loaded, precompressed={name: {} for name in precompressed})
+
+
+@pytest.mark.parametrize("corpus_instance, name, expected", [
+    (corpus(), "author", "cheap"),
+    (corpus(), "word_freq", "heavy"),
+    (corpus(), "int_to_word", "heavy"),
+    (corpus(), "all_paragraphs", "heavy"),
+    (corpus(arrays_loaded=True), "word_freq", "cheap"),
+    (corpus(arrays_loaded=True), "all_paragraphs", "cheap"),
+    (corpus(precompressed=["word_freq"]), "word_freq", "cheap"),
+    (corpus(precompressed=["word_freq"]), "word_to_int", "heavy"),
+    (corpus(arrays_loaded=True), "all_embeddings", "heavy"),
+    (corpus(arrays_loaded=True), "all_umap", "heavy"),
+    (None, "word_freq", "cheap"),
+])
+def test_endpoint_class_per_instance(corpus_instance, name, expected):
+    assert endpoint_class(corpus_instance, name) == expected
+
+
+@pytest.mark.parametrize("corpus_instance, name, expected", [
+    (corpus(), "author", "cheap"),
+    (corpus(), "word_freq", "heavy"),
+    (corpus(arrays_loaded=True), "word_freq", "cheap"),
+])
+def test_corpus_admission_holds_a_slot_of_its_class(corpus_instance, name, expected):
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(corpus_cache={"spanish": corpus_instance})))
+
+    async def scenario():
+        dependency = corpus_admission("spanish", name, request)
+        await dependency.__anext__()
+        active = {key: get_limiter(key).active for key in ("cheap", "heavy")}
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+        return active
+
+    active = asyncio.run(scenario())
+    assert active[expected] == 1
+    assert sum(active.values()) == 1
@@ -0,0 +1,44 @@
+# tests/test_batch.py
+
+import asyncio
+
+from pedro_paramo_api.operations.corpus import Corpus
+from pedro_paramo_api.routers.batch import BatchItem, _Batch
+
+
+def run_batch(items):
+    async def scenario():
+        corpus_cache = {"spanish": await Corpus.create(None, "spanish")}
+        batch = _Batch(corpus_cache)
+        return await asyncio.gather(*(batch.run_item(item) for item in items))
+    return asyncio.run(scenario())
+
+
+def test_word_freq_methods_share_one_word_freq(counting_backend):
+    results = run_batch([
+        BatchItem(version="spanish", name="word_freq"),
+        BatchItem(version="spanish", name="int_to_word"),
+        BatchItem(version="spanish", name="word_to_int"),
+        BatchItem(version="spanish", name="word_freq"),
+    ])
+
+    assert [list(entry) for entry in results] == [["version", "name", "result"]] * 4
+    word_freq = results[0]["result"]
+    assert word_freq == {"a": 2, "vine": 1, "comala": 1, "buscar": 1}
+    assert results[1]["result"] == dict(enumerate(word_freq))
+    assert results[2]["result"] == {word: i for i, word in enumerate(word_freq)}
+    assert results[3]["result"] == word_freq
+    # Corpus.create and one shared word_freq read the version row
+    assert counting_backend.reads[("version", "spanish")] == 2
+
+
+def test_error_strings_become_item_errors(counting_backend):
+    results = run_batch([
+        BatchItem(version="spanish", name="n_paragraph", args={"n_paragraph": 99}),
+        BatchItem(version="spanish", name="n_paragraph", args={"n_paragraph": 1}),
+        BatchItem(version="missing", name="word_freq"),
+    ])
+
+    assert results[0]["error"]["status_code"] == 404
+    assert "result" in results[1]
+    assert results[2]["error"] == {"status_code": 404, "detail": "Version 'missing' not found or not loaded."}
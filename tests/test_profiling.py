@@ -0,0 +1,20 @@
+# tests/test_profiling.py
+
+import pytest
+
+from pedro_paramo_api.profiling import profile_mode
+
+
+@pytest.mark.parametrize("query_string, mode", [
+    (b"profile=1", "json"),
+    (b"profile=true", "json"),
+    (b"profile=True&x=2", "json"),
+    (b"profile=collapsed", "collapsed"),
+    (b"profile=0", None),
+    (b"profile=false", None),
+    (b"profile=", None),
+    (b"profile=maybe", None),
+    (b"", None),
+])
+def test_profile_mode(query_string, mode):
+    assert profile_mode(query_string) == mode
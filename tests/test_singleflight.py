@@ -0,0 +1,130 @@
+# tests/test_singleflight.py
+
+import asyncio
+
+import pytest
+
+from pedro_paramo_api.operations.corpus import Corpus
+from pedro_paramo_api.operations.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(10)))
+        return calls, results, flights.in_flight()
+
+    calls, results, in_flight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["done"] * 10
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        results = await asyncio.gather(flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b")))
+        return sorted(calls), results
+
+    assert asyncio.run(scenario()) == (["a", "b"], ["a", "b"])
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("broken")
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)), return_exceptions=True)
+        return calls, results, flights.in_flight()
+
+    calls, results, in_flight = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) and str(result) == "broken" for result in results)
+    assert in_flight == 0
+
+
+def test_follower_retries_when_the_leader_is_cancelled():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+        started = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.01)
+            return calls
+
+        leader = asyncio.create_task(flights.do("key", work))
+        await started.wait()
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, calls
+
+    result, calls = asyncio.run(scenario())
+    # The follower became the new leader and ran the work a second time
+    assert result == 2
+    assert calls == 2
+
+
+def test_cancelled_follower_does_not_cancel_the_work():
+    async def scenario():
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.01)
+            return "done"
+
+        leader = asyncio.create_task(flights.do("key", work))
+        await started.wait()
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_concurrent_corpus_requests_read_the_storage_once(counting_backend):
+    async def scenario():
+        corpus = await Corpus.create(None, "spanish")
+        counting_backend.reads.clear()
+        word_freqs = await asyncio.gather(*(corpus.word_freq(None) for _ in range(10)))
+        embeddings = await asyncio.gather(*(corpus.all_embeddings(None) for _ in range(10)))
+        return word_freqs, embeddings
+
+    word_freqs, embeddings = asyncio.run(scenario())
+    assert all(word_freq == word_freqs[0] for word_freq in word_freqs)
+    assert all(result is embeddings[0] for result in embeddings)
+    assert counting_backend.reads == {("version", "spanish"): 1, ("paragraph", "spanish"): 1}
@@ -0,0 +1,62 @@
+# tests/test_storage.py
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from pedro_paramo_api.database.storage import StorageBackend
+
+
+def test_version_names_are_sorted(backend):
+    assert asyncio.run(backend.version_names(None)) == ["english", "spanish"]
+
+
+def test_version_columns(backend, corpus_rows):
+    versions, _ = corpus_rows
+    assert asyncio.run(backend.version_columns(None, "spanish")) == versions[0]
+    assert asyncio.run(backend.version_columns(None, "english", ["author", "ISBN"])) == {"author": "Juan Rulfo", "ISBN": None}
+    assert asyncio.run(backend.version_columns(None, "missing")) is None
+    with pytest.raises(ValueError):
+        asyncio.run(backend.version_columns(None, "spanish", ["author; DROP TABLE version"]))
+
+
+def test_paragraph_columns_are_ordered_by_n_paragraph(backend):
+    data = asyncio.run(backend.paragraph_columns(None, "spanish", ["n_paragraph", "text", "n_words"]))
+    assert data == {"n_paragraph": [1, 2], "text": ["Vine", "a Comala a buscar"], "n_words": [1, 4]}
+
+    data = asyncio.run(backend.paragraph_columns(None, "spanish", ["text"], n_paragraphs=[2, 5]))
+    assert data == {"text": ["a Comala a buscar"]}
+    assert asyncio.run(backend.paragraph_columns(None, "missing", ["text"])) == {"text": []}
+
+
+def test_vectors_round_trip_through_float32_blobs(backend, corpus_rows):
+    _, paragraphs = corpus_rows
+    data = asyncio.run(backend.paragraph_columns(None, "spanish", ["embedding", "umap"]))
+    for column in ("embedding", "umap"):
+        expected = [np.array(row[column], dtype=np.float32) for row in sorted(paragraphs[:2], key=lambda row: row["n_paragraph"])]
+        for vector, original in zip(data[column], expected):
+            assert vector.dtype == np.float32
+            np.testing.assert_array_equal(vector, original)
+
+
+def test_paragraph_vector_returns_the_stored_decimals(backend):
+    # Identical to what PostgresBackend parses from pgvector's text output
+    assert asyncio.run(backend.paragraph_vector(None, "spanish", 1, "embedding")) == [0.7, 0.12345679, 1e-07]
+    assert asyncio.run(backend.paragraph_vector(None, "spanish", 2, "umap")) == [1.5, 2.0, -3.1]
+    assert asyncio.run(backend.paragraph_vector(None, "spanish", 9, "umap")) is None
+    with pytest.raises(ValueError):
+        asyncio.run(backend.paragraph_vector(None, "spanish", 1, "text"))
+
+
+def test_content_hash_comes_from_the_export(backend):
+    assert asyncio.run(backend.content_hash(None)) == "abc123"
+
+
+def test_incomplete_backend_fails_when_created():
+    class PartialBackend(StorageBackend):
+        async def version_names(self, session):
+            return []
+
+    with pytest.raises(TypeError):
+        PartialBackend()